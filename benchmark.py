@@ -0,0 +1,54 @@
+import time
+import pandas as pd
+from tabulate import tabulate
+from clients.iqfeed import IQFeedClient
+from clients.fakeiqfeed import FakeIQFeedServer
+from clients.store import PriceStoreClient
+from clients.prices import PricesDBClient
+
+
+def benchmarkdownload(dates, symbols, workers=(1, 2, 4, 8, 16), latency=0.05, throughput=None):
+    ''' Time Downloading the Given Dates & Symbols From a Fake IQFeed Server,
+    With Different Numbers of Concurrent Workers
+    '''
+    server = FakeIQFeedServer(latency=latency, throughput=throughput).start()
+    try:
+        results = {}
+        for count in workers:
+            client = IQFeedClient(server.host, server.port)
+            start = time.time()
+            bars = 0
+            for _, prices in client.getdates(symbols, dates, count):
+                bars += prices.count().sum()
+            elapsed = time.time() - start
+
+            results[count] = {
+                'seconds': elapsed,
+                'requests/s': len(dates) * len(symbols) / elapsed,
+                'bars/s': bars / elapsed,
+            }
+    finally:
+        server.stop()
+
+    results = pd.DataFrame(results).T[['seconds', 'requests/s', 'bars/s']]
+    results.index.name = 'workers'
+    return results
+
+
+if __name__ == '__main__':
+    # Download a few months of bars for symbols available on all of them:
+    dates = pd.to_datetime(['2019-01-04', '2019-03-08', '2019-04-05', '2019-05-03'])
+    symbols = None
+    for date in dates:
+        prices = PriceStoreClient.readcsv('clients/datasets/prices/%s.csv' % date.date())
+        columns = set(prices.dropna(axis=1, how='all').columns)
+        symbols = columns if symbols is None else symbols & columns
+    symbols = sorted(symbols)
+
+    print('IQFeed Download Throughput (%s Dates x %s Symbols, 50ms Latency):' % (len(dates), len(symbols)))
+    results = benchmarkdownload(dates, symbols)
+    print(tabulate(results.round(2), headers=results.columns, tablefmt='github'))
+
+    print('Database Price Date/Time Split Throughput (Rows/s):')
+    results = PricesDBClient.benchmarksplit()
+    print(tabulate(results.round(1), headers=results.columns, tablefmt='github'))
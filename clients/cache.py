@@ -0,0 +1,77 @@
+import os
+import hashlib
+import pandas as pd
+
+
+def writefile(filename, write):
+    ''' Write a File by Calling `write` on a Temporary Path, Then Renaming It
+    Into Place (So That Readers Never See a Partially Written File)
+    '''
+    folder = os.path.dirname(filename)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    write(filename + '.tmp')
+    os.rename(filename + '.tmp', filename)
+
+
+class ReturnsCacheClient(object):
+    def __init__(self, path='clients/datasets/cache'):
+        ''' Persisted Cache of Per-Announcement Returns, Changes & Costs
+
+        Entries are kept per (before, after) window, keyed by announcement
+        date, and are only valid for the price file hash they were computed
+        from
+        '''
+        self.path = path
+        self._hashes = None
+
+    def _filename(self, name):
+        ''' Get Full Path to a File in the Cache
+        '''
+        return os.path.join(self.path, name)
+
+    def _read(self, name):
+        ''' Read a Pickled Cache File (Empty If It Has Not Been Written)
+        '''
+        filename = self._filename(name)
+        return pd.read_pickle(filename) if os.path.isfile(filename) else {}
+
+    def _write(self, name, value):
+        ''' Write a Pickled Cache File
+        '''
+        writefile(self._filename(name), lambda filename: pd.to_pickle(value, filename))
+
+    def filehash(self, filename):
+        ''' Get the MD5 Hash of the Given File (None If It Does Not Exist)
+
+        Hashes are remembered against the file's size & modification time, so
+        unchanged files are not re-read
+        '''
+        if not os.path.isfile(filename):
+            return None
+
+        if self._hashes is None:
+            self._hashes = self._read('hashes.pkl')
+
+        stat = os.stat(filename)
+        signature = (stat.st_size, stat.st_mtime)
+        cached = self._hashes.get(filename)
+        if cached is None or cached[0] != signature:
+            with open(filename, 'rb') as source:
+                digest = hashlib.md5(source.read()).hexdigest()
+
+            self._hashes[filename] = cached = (signature, digest)
+            self._write('hashes.pkl', self._hashes)
+
+        return cached[1]
+
+    def load(self, before, after):
+        ''' Load the {date: entry} Cache of the Given Trade Window
+        '''
+        return self._read('returns-%s-%s.pkl' % (before, after))
+
+    def save(self, before, after, entries):
+        ''' Save the {date: entry} Cache of the Given Trade Window
+        '''
+        self._write('returns-%s-%s.pkl' % (before, after), entries)
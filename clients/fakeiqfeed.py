@@ -0,0 +1,148 @@
+import os
+import time
+import datetime
+import threading
+import pandas as pd
+from clients.store import PriceStoreClient
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+
+class FakeIQFeedServer(object):
+    def __init__(self, host='localhost', port=0, folder='clients/datasets/prices', latency=0., throughput=None):
+        ''' Local Stand-In for the IQFeed Historical Lookup Port
+
+        Answers HIT interval bar & HTT tick requests by replaying the bundled
+        per-date prices CSVs (every bar's open, high, low & close are the
+        recorded price, and every recorded price is replayed as one tick), waiting `latency` seconds before each response and sending no
+        faster than `throughput` bytes per second (if given). Port 0 binds to
+        any free port, which is then available as `port` once started
+        '''
+        self.host = host
+        self.port = port
+        self.folder = folder
+        self.latency = latency
+        self.throughput = throughput
+        self._server = None
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        ''' Start Serving Requests on a Background Thread
+        '''
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # Clients may send any number of requests per connection:
+                for line in self.rfile:
+                    server._respond(line.decode().strip(), self.wfile)
+
+        class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        ''' Stop Serving Requests
+        '''
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _getprices(self, date):
+        ''' Get (Cached) Prices on a Date (None If There Are None)
+        '''
+        with self._lock:
+            if date not in self._frames:
+                filename = os.path.join(self.folder, '%s.csv' % date)
+                self._frames[date] = PriceStoreClient.readcsv(filename) if os.path.isfile(filename) else None
+
+            return self._frames[date]
+
+    def _getcloses(self, symbol, start, end):
+        ''' Get a Symbol's Recorded Prices Between Two Datetimes
+        '''
+        closes = []
+        day = start.date()
+        while day <= end.date():
+            prices = self._getprices(day)
+            if prices is not None and symbol in prices:
+                close = prices[symbol].dropna()
+                closes.append(close[(close.index >= start) & (close.index <= end)])
+            day += datetime.timedelta(days=1)
+
+        return pd.concat(closes) if closes else pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+
+    def _getlines(self, query):
+        ''' Get the Response Lines for a HIT (Interval Bars) or HTT (Ticks)
+        Request
+        '''
+        fields = query.split(',')
+        if fields[0] not in ('HIT', 'HTT') or len(fields) < 4 + (fields[0] == 'HIT'):
+            return ['E,!SYNTAX_ERROR!,']
+
+        # Bar requests carry the interval before the start & end:
+        symbol = fields[1]
+        offset = 3 if fields[0] == 'HIT' else 2
+        start = datetime.datetime.strptime(fields[offset], '%Y%m%d %H%M%S')
+        end = datetime.datetime.strptime(fields[offset + 1], '%Y%m%d %H%M%S')
+        closes = self._getcloses(symbol, start, end)
+
+        if fields[0] == 'HIT':
+            lines = [
+                '%s,%s,%s,%s,%s,0,0,' % (timestamp, close, close, close, close)
+                for timestamp, close in zip(closes.index.strftime('%Y-%m-%d %H:%M:%S'), closes.values)
+            ]
+        else:
+            # Replay each recorded price as a single one-lot trade at that
+            # price, quoted on both sides:
+            lines = [
+                '%s,%s,1,%s,%s,%s,%s,C,0,01,' % (timestamp, close, tick, close, close, tick)
+                for tick, (timestamp, close) in enumerate(
+                    zip(closes.index.strftime('%Y-%m-%d %H:%M:%S.%f'), closes.values), 1
+                )
+            ]
+
+        return lines or ['E,!NO_DATA!,']
+
+    def _respond(self, query, wfile):
+        ''' Write the Response to a Request, Paced by Latency & Throughput
+        '''
+        if not query:
+            return
+
+        response = ('\r\n'.join(self._getlines(query) + ['!ENDMSG!,']) + '\r\n').encode()
+        time.sleep(self.latency)
+
+        if self.throughput is None:
+            wfile.write(response)
+        else:
+            chunksize = 4096
+            for offset in range(0, len(response), chunksize):
+                chunk = response[offset:offset + chunksize]
+                wfile.write(chunk)
+                wfile.flush()
+                time.sleep(len(chunk) / float(self.throughput))
+
+        wfile.flush()
+
+
+if __name__ == '__main__':
+    # Serve the bundled prices on the usual IQFeed lookup port:
+    server = FakeIQFeedServer(port=9100).start()
+    print('Serving Fake IQFeed on %s:%s (Ctrl-C to Stop)...' % (server.host, server.port))
+    try:
+        while True:
+            time.sleep(1.)
+    except KeyboardInterrupt:
+        server.stop()
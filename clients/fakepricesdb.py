@@ -0,0 +1,91 @@
+import os
+import glob
+import sqlite3
+from clients.store import PriceStoreClient
+
+
+class FakePricesDB(object):
+    # Same tables as the findb prices database (only the columns that are read):
+    schema = [
+        'CREATE TABLE tradable (id INTEGER PRIMARY KEY, name TEXT NOT NULL)',
+        'CREATE TABLE price_request (id INTEGER PRIMARY KEY, tradable_id INTEGER NOT NULL)',
+        '''CREATE TABLE price (
+            request_id INTEGER NOT NULL,
+            time TIMESTAMP NOT NULL,
+            open REAL, high REAL, low REAL, close REAL, volume INTEGER
+        )''',
+        'CREATE INDEX price_time ON price (time)',
+        'CREATE INDEX price_request_id ON price (request_id)',
+    ]
+
+    def __init__(self, filename='clients/datasets/fakeprices.db', folder='clients/datasets/prices'):
+        ''' Local SQLite Stand-In for the Prices Database
+
+        Loads the bundled per-date prices CSVs into the tradable, price_request
+        & price tables (one price request per symbol per date, with every
+        minute's open, high, low & close set to the recorded price), so that
+        PricesDBClient(dbpath=FakePricesDB().build().dbpath) can be run without
+        database access
+        '''
+        self.filename = filename
+        self.folder = folder
+
+    @property
+    def dbpath(self):
+        ''' Get the SQLAlchemy URL of the Database
+        '''
+        return 'sqlite:///%s' % os.path.abspath(self.filename)
+
+    def build(self, dates=None):
+        ''' (Re-)Create the Database From the Prices CSVs of the Given Dates
+        (All Dates By Default)
+        '''
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+        filenames = sorted(glob.glob(os.path.join(self.folder, '*.csv')))
+        if dates is not None:
+            filenames = [os.path.join(self.folder, '%s.csv' % date) for date in dates]
+
+        connection = sqlite3.connect(self.filename)
+        try:
+            for statement in self.schema:
+                connection.execute(statement)
+
+            tradables = {}
+            requests = 0
+            for filename in filenames:
+                prices = PriceStoreClient.readcsv(filename)
+                for symbol in prices.columns:
+                    closes = prices[symbol].dropna()
+                    if closes.empty:
+                        continue
+
+                    if symbol not in tradables:
+                        tradables[symbol] = len(tradables) + 1
+                        connection.execute('INSERT INTO tradable VALUES (?, ?)', (tradables[symbol], symbol))
+
+                    requests += 1
+                    connection.execute('INSERT INTO price_request VALUES (?, ?)', (requests, tradables[symbol]))
+                    connection.executemany('INSERT INTO price VALUES (?, ?, ?, ?, ?, ?, 0)', zip(
+                        [requests] * len(closes),
+                        closes.index.strftime('%Y-%m-%d %H:%M:%S'),
+                        closes.values, closes.values, closes.values, closes.values,
+                    ))
+
+            connection.commit()
+        finally:
+            connection.close()
+
+        return self
+
+
+if __name__ == '__main__':
+    # Build a stand-in database from a few dates, and download them back:
+    from clients.prices import PricesDBClient
+    dates = ['2019-01-04', '2019-03-08', '2019-04-05', '2019-05-03']
+    fake = FakePricesDB().build(dates)
+    database = PricesDBClient(dbpath=fake.dbpath, workers=4)
+    symbols = database.getsymbols()
+    print('Built %s With %s Symbols' % (fake.filename, len(symbols)))
+    database.downloaddates(symbols, dates, folder='clients/datasets/fakeprices')
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from clients.cache import writefile
+
+
+class HTTPCacheClient(object):
+    def __init__(self, path='clients/datasets/http', ttl=6 * 3600., offline=False, headers=None, timeout=30.):
+        ''' Persisted Cache of JSON GET Responses
+
+        Responses younger than `ttl` seconds are served from disk; older ones
+        are revalidated with their ETag / Last-Modified headers (so unchanged
+        responses are not downloaded again). Concurrent requests for the same
+        URL share one fetch, and in `offline` mode only cached responses are
+        served, however old. Requests that take longer than `timeout` seconds
+        fall back to any cached response
+        '''
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _filename(self, url):
+        ''' Get Full Path to the Cache File of a URL
+        '''
+        return os.path.join(self.path, '%s.json' % hashlib.md5(url.encode('utf-8')).hexdigest())
+
+    def _read(self, url):
+        ''' Read the Cached Entry of a URL (None If It Has Not Been Cached)
+        '''
+        filename = self._filename(url)
+        if not os.path.isfile(filename):
+            return None
+
+        with open(filename, 'r') as cachefile:
+            return json.load(cachefile)
+
+    def _write(self, url, entry):
+        ''' Write the Cached Entry of a URL
+        '''
+        def write(filename):
+            with open(filename, 'w') as cachefile:
+                json.dump(entry, cachefile)
+
+        writefile(self._filename(url), write)
+
+    def get(self, url):
+        ''' Get the JSON Response to a GET Request, Joining Any Identical
+        Request That Is Already in Flight
+        '''
+        with self._lock:
+            call = self._inflight.get(url)
+            leader = call is None
+            if leader:
+                call = self._inflight[url] = {'done': threading.Event()}
+
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['body']
+
+        try:
+            call['body'] = self._get(url)
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            call['done'].set()
+
+        return call['body']
+
+    def _get(self, url):
+        ''' Get the JSON Response to a GET Request, From the Cache If It Is
+        Fresh (or Still Valid), Otherwise From the Network
+        '''
+        entry = self._read(url)
+        if entry is not None and (self.offline or time.time() - entry['fetched'] < self.ttl):
+            return entry['body']
+
+        if self.offline:
+            raise Exception('No Cached Response Available Offline: %s' % url)
+
+        # Ask the server to only send the response if it has changed:
+        headers = dict(self.headers)
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('lastmodified'):
+            headers['If-Modified-Since'] = entry['lastmodified']
+
+        print('Sending GET Request to %s...' % url)
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print('Warning: Serving Stale Response for %s: %s' % (url, e))
+            return entry['body']
+
+        if response.status_code == 304 and entry is not None:
+            entry['fetched'] = time.time()
+        else:
+            entry = {
+                'url': url,
+                'fetched': time.time(),
+                'etag': response.headers.get('ETag'),
+                'lastmodified': response.headers.get('Last-Modified'),
+                'body': response.json(),
+            }
+
+        self._write(url, entry)
+        return entry['body']
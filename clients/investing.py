@@ -1,18 +1,37 @@
 import json
 import urllib
-import requests
-import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
+from multiprocessing.pool import ThreadPool
+from clients.httpcache import HTTPCacheClient
 
 class InvestingClient(object):
-    def __init__(self):
-        '''
+    # Economic calendar indicators, as {name: (investing.com event id, scale)},
+    # where values reported in thousands are scaled back to regular units:
+    indicators = {
+        'adp': (1, 1000),
+        'nfp': (227, 1000),
+        'unemployment': (300, 1),
+        'jobless-claims': (294, 1000),
+        'cpi': (733, 1),
+        'core-cpi': (736, 1),
+        'fomc': (168, 1),
+        'retail-sales': (256, 1),
+        'ism': (173, 1),
+        'gdp': (375, 1),
+    }
+
+    def __init__(self, offline=False):
+        ''' Investing.com Economic Calendar Client
+
+        Responses are cached on disk (see HTTPCacheClient), and with `offline`
+        set only cached responses are used
         '''
         self._domain = 'https://sbcharts.investing.com'
         self._headers = {
             'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.54 Safari/537.36'
         }
+        self.http = HTTPCacheClient(offline=offline, headers=self._headers)
 
     def save(self):
         ''' Download & Save Combined Employment & Payroll Dataset to CSV
@@ -48,36 +67,82 @@ class InvestingClient(object):
     def employment(self):
         ''' Download ADP Nonfarm Employment Changes
         '''
-        return self._download(1)
+        return self._download(*self.indicators['adp'])
 
     def payrolls(self):
         ''' Download Nonfarm Payrolls
         '''
-        return self._download(227)
+        return self._download(*self.indicators['nfp'])
 
-    def _download(self, id):
+    def _fetchindicator(self, name):
+        ''' Download an Indicator's Releases in Long Format (Empty If It Could
+        Not Be Fetched)
+        '''
+        try:
+            events = self._getevents(*self.indicators[name])
+        except:
+            print('Warning: %s Releases Could Not Be Fetched, Skipping...' % name)
+            return pd.DataFrame(columns=['indicator', 'released', 'forecast', 'actual', 'surprise'])
+
+        events = events[['released', 'forecast', 'actual']].reset_index(drop=True)
+        events.insert(0, 'indicator', name)
+        events['surprise'] = events['actual'] - events['forecast']
+        return events
+
+    def events(self, indicators=None, workers=8):
+        ''' Download Releases of Several Indicators at Once (All Registered
+        Indicators By Default) as One Long Table of (indicator, released,
+        forecast, actual, surprise) Rows, Ordered by Release Time
+
+        Release times are US/Eastern, without a timezone, to match the price
+        minute timestamps
+        '''
+        names = list(indicators or sorted(self.indicators))
+        pool = ThreadPool(workers)
+        try:
+            events = pd.concat(pool.map(self._fetchindicator, names), ignore_index=True)
+        finally:
+            pool.close()
+            pool.join()
+
+        events['indicator'] = pd.Categorical(events['indicator'], categories=names)
+        events['released'] = pd.to_datetime(events['released']).values.astype('datetime64[ns]')
+        for column in ['forecast', 'actual', 'surprise']:
+            events[column] = events[column].astype(float)
+
+        return events.sort_values(['released', 'indicator']).reset_index(drop=True)
+
+    def _download(self, id, scale=1000):
         ''' Download Events Dataset From Investing.com Based on Dataset ID
         '''
+        # Finally, trim unused data and return:
+        return self._getevents(id, scale)[['forecast', 'actual', 'date', 'time']]
+
+    def _getevents(self, id, scale=1000):
+        ''' Download Every Column of an Events Dataset From Investing.com
+        '''
         # Construct API URL::
         url = '%s/events_charts/us/%s.json' % (self._domain, id)
 
-        # Send API Request:
-        print('Sending GET Request to %s...' % url)
-        response = requests.get(url, headers=self._headers).json().get('attr')
+        # Send API Request (or Reuse a Cached Response):
+        response = self.http.get(url).get('attr')
 
-        # Add Formated columns for date/month from response timestamps:
+        # Add Formated columns for date/month from response timestamps, which
+        # are epoch milliseconds, read as US/Eastern (the exchange's clock,
+        # whatever the local timezone) so release times line up across DST:
         dataset = pd.DataFrame(response)
-        dataset['date'] = dataset.timestamp.map(lambda ts: datetime.datetime.fromtimestamp(ts / 1000).date())
-        dataset['time'] = dataset.timestamp.map(lambda ts: datetime.datetime.fromtimestamp(ts / 1000).time())
-        dataset['month'] = dataset.date.map(lambda dt: dt.strftime('%Y-%m'))
+        timestamps = pd.to_datetime(dataset.timestamp, unit='ms', utc=True).dt.tz_convert('US/Eastern')
+        dataset['date'] = timestamps.dt.date
+        dataset['time'] = timestamps.dt.time
+        dataset['month'] = timestamps.dt.strftime('%Y-%m')
+        dataset['released'] = timestamps.dt.tz_localize(None)
         dataset.index = dataset['month']
 
         # Convert thousands back to regular units:
-        dataset['forecast'] *= 1000
-        dataset['actual'] *= 1000
+        dataset['forecast'] *= scale
+        dataset['actual'] *= scale
 
-        # Finally, trim unused data and return:
-        return dataset[['forecast', 'actual', 'date', 'time']]
+        return dataset
 
     def getcurrent(self):
         ''' Get most recent employment
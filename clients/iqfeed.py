@@ -2,8 +2,131 @@ import os
 import sys
 import socket
 import datetime
+import threading
+import numpy as np
 import pandas as pd
-from StringIO import StringIO
+from multiprocessing.pool import ThreadPool
+from clients.store import PriceStoreClient
+
+
+class IQFeedConnectionPool(object):
+    def __init__(self, host='localhost', port=9100):
+        ''' Pool of Reusable Sockets to the IQFeed Lookup Port
+        '''
+        self.host = host
+        self.port = port
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        ''' Get an Idle Connection, Opening a New One If None Are Idle
+        '''
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((self.host, self.port))
+        return sock
+
+    def release(self, sock):
+        ''' Return a Connection to the Pool, Once Its Response Has Been Read
+        '''
+        with self._lock:
+            self._idle.append(sock)
+
+    def discard(self, sock):
+        ''' Close a Connection That Can't Be Reused (e.g. After an Error)
+        '''
+        sock.close()
+
+    def close(self):
+        ''' Close All Idle Connections
+        '''
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for sock in idle:
+            sock.close()
+
+
+class IQFeedParser(object):
+    bars = ('high', 'low', 'open', 'close', 'vol', 'periodvol')
+    ticks = ('last', 'lastsize', 'totalvol', 'bid', 'ask', 'tickid')
+
+    def __init__(self, columns=bars, unit='s', capacity=4096):
+        ''' Incremental Parser of IQFeed Historical Bar & Tick Responses
+
+        Bytes are fed in as they arrive off the socket, and each complete
+        line is parsed exactly once, straight into preallocated timestamp &
+        value arrays (which double in size whenever they fill up) -- the
+        timestamps are kept to the given unit ('s' for bars, 'us' for ticks)
+        '''
+        self.columns = list(columns)
+        self.done = False
+        self.nodata = False
+        self.error = None
+        self._buffer = bytearray()
+        self._rows = 0
+        self._times = np.empty(capacity, dtype='datetime64[%s]' % unit)
+        self._values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+
+    def feed(self, chunk):
+        ''' Parse a Chunk of Response Bytes, Returning Whether the Response's
+        !ENDMSG! Terminator Has Been Reached
+        '''
+        self._buffer += chunk
+
+        # Only parse through the last complete line (the terminator is always
+        # on a line of its own, so it is seen as soon as that line completes):
+        end = self._buffer.rfind(b'\n')
+        if end < 0:
+            return self.done
+
+        lines = bytes(self._buffer[:end]).decode('ascii').split('\n')
+        del self._buffer[:end + 1]
+
+        rows = []
+        for line in lines:
+            fields = line.rstrip('\r').rstrip(',').split(',')
+            if fields[0] == '!ENDMSG!':
+                self.done = True
+                break
+            elif fields[0] == 'E':
+                # Keep the first error's text, telling "no data" apart from
+                # real errors (bad requests, unknown symbols, etc):
+                if '!NO_DATA!' in fields:
+                    self.nodata = True
+                elif self.error is None:
+                    self.error = ','.join(fields[1:])
+            elif len(fields) > len(self.columns):
+                rows.append(fields)
+
+        if rows:
+            self._append(rows)
+
+        return self.done
+
+    def _append(self, rows):
+        ''' Decode Split Rows Into the Timestamp & Value Arrays
+        '''
+        count = self._rows + len(rows)
+        if count > len(self._times):
+            capacity = max(count, 2 * len(self._times))
+            self._times = np.resize(self._times, capacity)
+            self._values = np.resize(self._values, (capacity, len(self.columns)))
+
+        width = len(self.columns) + 1
+        self._times[self._rows:count] = np.array([row[0] for row in rows], dtype=self._times.dtype)
+        self._values[self._rows:count] = np.array([row[1:width] for row in rows], dtype=np.float64)
+        self._rows = count
+
+    def frame(self):
+        ''' Get the Parsed Bars as a DataFrame, Indexed by Timestamp
+        '''
+        index = pd.DatetimeIndex(self._times[:self._rows].astype('datetime64[ns]'))
+        return pd.DataFrame(self._values[:self._rows], index=index, columns=self.columns)
+
 
 class IQFeedClient(object):
     def __init__(self, host='localhost', port=9100, buffersize=4096):
@@ -12,6 +135,7 @@ class IQFeedClient(object):
         self.host = host
         self.port = port
         self.buffersize = buffersize
+        self.pool = IQFeedConnectionPool(host, port)
 
     @classmethod
     def symbols(cls):
@@ -37,40 +161,43 @@ class IQFeedClient(object):
         return [datetime.datetime.strptime(date, '%Y-%m-%d') for date in dates]
 
 
-    def _doquery(self, query):
+    def _doquery(self, query, parser=None):
         ''' Do IQFeed Query
         '''
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((host, port))
+        sock = self.pool.acquire()
+        parser = parser or IQFeedParser()
         try:
             # Send data request:
-            #print 'Connected to %s:%s, Requesting Data...' % (host, port)
+            #print 'Connected to %s:%s, Requesting Data...' % (self.host, self.port)
             #print 'IQFeed QUERY: %s' % query
-            sock.sendall(query)
+            sock.sendall(query.encode())
 
+            # Parse repsonse data as it is read in from the TCP Socket:
+            while not parser.done:
+                chunk = sock.recv(self.buffersize)
+                if not chunk:
+                    raise Exception('IQFeed Connection Closed During Query: %s' % query)
 
-            # Read in repsonse data from TCP Socket:
-            data = 'high,low,open,close,vol,periodvol,_\n'
-            while True:
-                data += sock.recv(self.buffersize).decode()
-                if '!ENDMSG!' in data:
-                    break
+                parser.feed(chunk)
 
-            # Drop 'ENDMSG' termination string:
-            data = data[:-12]
+        except:
+            # Don't reuse a connection that may have unread data on it:
+            self.pool.discard(sock)
+            raise
 
-        finally:
-            # Close the TCP Socket:
-            sock.close()
+        else:
+            # Hand the TCP Socket back for the next query:
+            self.pool.release(sock)
 
 
-        if '!NO_DATA!' in data:
+        if parser.error is not None:
+            # IQFeed rejected our query:
+            raise Exception('IQFeed Error (%s) for Query: %s' % (parser.error, query.strip()))
+        elif parser.nodata:
             # No data returned for our query:
             raise Exception('Data Unavailable for IQFeed Query: %s' % query)
         else:
-            # Parse data into dataframe:
-            iodata = StringIO(data)
-            return pd.read_csv(iodata, parse_dates=True).drop('_', axis=1)
+            return parser.frame()
 
 
     def fetch(self, symbol, start, end, seconds=60):
@@ -84,19 +211,121 @@ class IQFeedClient(object):
         )
         return self._doquery(query)
 
+    def fetchbars(self, symbol, start, end, seconds=1):
+        ''' Fetch OHLCV Bars of the Given Interval Between Two Datetimes
+        '''
+        query = "HIT,%s,%s,%s,%s,,,,1\n" % (
+            symbol,
+            seconds,
+            start.strftime('%Y%m%d %H%M%S'),
+            end.strftime('%Y%m%d %H%M%S'),
+        )
+        return self._doquery(query)
+
+    def fetchticks(self, symbol, start, end):
+        ''' Fetch Every Tick Between Two Datetimes
+        '''
+        query = "HTT,%s,%s,%s,,,,1\n" % (
+            symbol,
+            start.strftime('%Y%m%d %H%M%S'),
+            end.strftime('%Y%m%d %H%M%S'),
+        )
+        return self._doquery(query, IQFeedParser(IQFeedParser.ticks, unit='us'))
+
+    def _fetchwindow(self, task):
+        ''' Fetch Ticks or Second Bars for a (kind, symbol, start, end) Task
+        (None If Unavailable)
+        '''
+        kind, symbol, start, end = task
+        try:
+            if kind == 'ticks':
+                return task, self.fetchticks(symbol, start, end)
+            else:
+                return task, self.fetchbars(symbol, start, end, seconds=1)
+        except:
+            print '  WARNING: %s unavailable for %s on %s, skipping...' % (kind, symbol, start.date())
+            return task, None
+
+    def downloadwindow(self, symbols, dates, store, kind='ticks', start=datetime.time(8, 15),
+                       end=datetime.time(10, 30), workers=8):
+        ''' Download Ticks (or 1-Second OHLCV Bars, for kind='bars') Between
+        the Given Times on Each Date, Writing Each Symbol/Date to the Tick Store
+        '''
+        tasks = [
+            (kind, symbol, datetime.datetime.combine(date, start), datetime.datetime.combine(date, end))
+            for date in sorted(set(dates)) for symbol in symbols
+        ]
+
+        pool = ThreadPool(workers)
+        try:
+            for (_, symbol, opened, _), frame in pool.imap_unordered(self._fetchwindow, tasks):
+                if frame is not None and not frame.empty:
+                    store.write(kind, symbol, opened.date(), frame)
+        finally:
+            pool.close()
+            pool.join()
+            self.pool.close()
+
+    def _fetchclose(self, task):
+        ''' Fetch Closing Prices for a (symbol, date) Task (None If Unavailable)
+        '''
+        symbol, date = task
+        try:
+            return symbol, date, self.fetch(symbol, date, date).close
+        except:
+            print '  WARNING: Data unavailable for %s on %s, skipping...' % (symbol, date)
+            return symbol, date, None
+
     def getdate(self, symbols, date):
         ''' Get minute-by-minute data for multiple symbols for a single date
         '''
         print 'Fetching Data for %s: %s...' % (date, symbols)
         returns = {}
         for symbol in symbols:
-            try:
-                returns[symbol] = client.fetch(symbol, date, date).close
-            except:
-                print '  WARNING: Data unavailable for %s on %s, skipping...' % (symbol, date)
+            _, _, closes = self._fetchclose((symbol, date))
+            if closes is not None:
+                returns[symbol] = closes
 
         return pd.DataFrame(returns).ffill().bfill()
 
+    def getdates(self, symbols, dates, workers=8):
+        ''' Get minute-by-minute data for multiple symbols for multiple dates,
+        fetching up to `workers` (symbol, date) pairs at once over pooled
+        connections, and yielding each (date, prices) as soon as it completes
+        '''
+        dates = sorted(set(dates))
+        pending = dict((date, len(symbols)) for date in dates)
+        results = dict((date, {}) for date in dates)
+
+        pool = ThreadPool(workers)
+        try:
+            tasks = [(symbol, date) for date in dates for symbol in symbols]
+            for symbol, date, closes in pool.imap_unordered(self._fetchclose, tasks):
+                if closes is not None:
+                    results[date][symbol] = closes
+
+                # Hand back each date once all of its symbols are in:
+                pending[date] -= 1
+                if not pending[date]:
+                    returns = results.pop(date)
+                    if returns:
+                        yield date, pd.DataFrame(returns).ffill().bfill()
+        finally:
+            pool.close()
+            pool.join()
+            self.pool.close()
+
+    def download(self, symbols, dates, store, workers=8):
+        ''' Download minute-by-minute data for multiple symbols for multiple
+        dates, appending each date to the price store as soon as it completes
+        '''
+        for date, prices in self.getdates(symbols, dates, workers):
+            if isinstance(date, datetime.datetime):
+                date = date.date()
+
+            print 'Storing %s Prices for %s...' % (prices.shape[1], date)
+            store.append(date, prices)
+
     def makefolder(self, relpath):
         '''
         '''
@@ -122,6 +351,5 @@ if __name__ == "__main__":
     symbols = IQFeedClient.symbols()
     dates = IQFeedClient.payrolldates()
 
-    # Aggregate data for all symbols for each date:
-    for date in dates:
-        client.getdate(symbols, date).to_csv('prices/%s.csv' % date.date())
+    # Aggregate data for all symbols for each date, straight into the store:
+    client.download(symbols, dates, PriceStoreClient())
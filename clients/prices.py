@@ -1,16 +1,29 @@
+import os
 import time
 import datetime
 import traceback
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, bindparam
+from multiprocessing.pool import ThreadPool
 
 
 class PricesDBClient(object):
-    def __init__(self, host, username, password):
-        '''
+    def __init__(self, host=None, username=None, password=None, dbpath=None, workers=8):
+        ''' Prices Database Client
+
+        Connects to the findb Postgres database on the given host, or to any
+        other database URL given as `dbpath` (e.g. a local sqlite:/// file),
+        keeping up to `workers` pooled connections open for concurrent queries
+        (downloaddates runs the same number of threads, so none of them ever
+        waits on a connection)
         '''
-        self.dbpath = 'postgresql://%s:%s@%s/findb' % (username, password, host)
-        self.engine = create_engine(self.dbpath)
+        self.workers = workers
+        self.dbpath = dbpath or 'postgresql://%s:%s@%s/findb' % (username, password, host)
+        if self.dbpath.startswith('sqlite'):
+            self.engine = create_engine(self.dbpath, connect_args={'check_same_thread': False})
+        else:
+            self.engine = create_engine(self.dbpath, pool_size=workers, max_overflow=0, pool_pre_ping=True)
 
     def getsymbols(self):
         ''' Get available equity symbols
@@ -22,35 +35,198 @@ class PricesDBClient(object):
         '''
         start = time.time()
         query = '''
-            SELECT open, high, low, close, time, date(time), volume
+            SELECT price.open, price.high, price.low, price.close, price.time, price.volume
             FROM price
-            WHERE request_id IN (
-                SELECT id FROM price_request WHERE tradable_id in (
-                    select id from tradable where name='%s'
-                )
-            )
-            AND date(time) = '%s';
-        ''' % (symbol, date)
-        prices = pd.read_sql(query, self.engine).sort_values('time')
+            JOIN price_request ON price.request_id = price_request.id
+            JOIN tradable ON price_request.tradable_id = tradable.id
+            WHERE tradable.name = :symbol
+            AND %s;
+        '''
+        predicate, params = self._daterange([date])
+        params['symbol'] = symbol
+        prices = pd.read_sql(text(query % predicate), self.engine, params=params, parse_dates=['time'])
+        prices = prices.sort_values('time')
         print('Downloaded %s Prices For %s on %s In %.2fs' % (prices.shape[0], symbol, date, time.time() - start))
 
         # Separate out date and time columns:
         prices.index = prices.time.copy()
-        prices['date'] = prices.time.map(lambda x: x.date())
-        prices['time'] = prices.time.map(lambda x: x.time())
+        return self.splittimes(prices)
+
+    @classmethod
+    def splittimes(cls, prices):
+        ''' Split the Datetime `time` Column Into Separate `date` & `time`
+        Columns, Converting All Rows at Once
+        '''
+        times = prices['time']
+        prices['date'] = times.dt.date
+        prices['time'] = times.dt.time
         return prices
 
-    def download(self, symbols, date):
+    @classmethod
+    def benchmarksplit(cls, rows=(10000, 100000, 1000000)):
+        ''' Time Splitting the Date & Time Columns of Minute Prices, Row by Row
+        (As Previously Done) vs All at Once, in Rows per Second
+        '''
+        timings = {}
+        for count in rows:
+            prices = pd.DataFrame({'time': pd.date_range('2019-01-04', periods=count, freq='min')})
+
+            start = time.time()
+            rowwise = prices.copy()
+            rowwise['date'] = rowwise.time.map(lambda x: x.date())
+            rowwise['time'] = rowwise.time.map(lambda x: x.time())
+            before = time.time() - start
+
+            start = time.time()
+            vectorized = cls.splittimes(prices.copy())
+            after = time.time() - start
+
+            if not (rowwise.date.equals(vectorized.date) and rowwise.time.equals(vectorized.time)):
+                raise Exception('Split Times Do Not Match Row-by-Row Split: %s Rows' % count)
+
+            timings[count] = {
+                'row-by-row': count / before,
+                'vectorized': count / after,
+                'speedup': before / after,
+            }
+
+        timings = pd.DataFrame(timings).T[['row-by-row', 'vectorized', 'speedup']]
+        timings.index.name = 'rows'
+        return timings
+
+    @classmethod
+    def _daterange(cls, dates):
+        ''' Get an SQL Predicate Matching Price Times on Any of the Given
+        Dates, Along With Its {name: value} Bound Parameters
+
+        Each date is matched as a half-open range on the raw time column
+        (rather than with date(time)), so that an index on time can be used
+        '''
+        ranges, params = [], {}
+        for i, date in enumerate(dates):
+            day = pd.Timestamp(date).normalize()
+            ranges.append('(price.time >= :start%s AND price.time < :end%s)' % (i, i))
+            params['start%s' % i] = day.strftime('%Y-%m-%d')
+            params['end%s' % i] = (day + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+        return '(%s)' % ' OR '.join(ranges), params
+
+    def iterbulk(self, dates, symbols=None, chunksize=100000):
+        ''' Get Closing Prices of All (or the Given) Symbols on Multiple Dates
+
+        Fetches everything in one query, ordered by time and read in chunks
+        of rows, yielding each (date, (minute x symbol) prices) as soon as
+        all of its rows have been read -- so no more than a date's rows (and
+        a chunk) are held at once. Dates without any rows are not yielded
+        '''
+        start = time.time()
+        predicate, params = self._daterange(dates)
+        query = '''
+            SELECT tradable.name AS symbol, price.time, price.close
+            FROM price
+            JOIN price_request ON price.request_id = price_request.id
+            JOIN tradable ON price_request.tradable_id = tradable.id
+            WHERE %s
+        ''' % predicate
+        if symbols is not None:
+            query += 'AND tradable.name IN :symbols\n'
+            params['symbols'] = list(symbols)
+        query = text(query + 'ORDER BY price.time')
+        if symbols is not None:
+            query = query.bindparams(bindparam('symbols', expanding=True))
+
+        rows = 0
+        pending = None
+        for chunk in pd.read_sql(query, self.engine, params=params, parse_dates=['time'], chunksize=chunksize):
+            # A query without any rows still reads back one empty chunk:
+            if chunk.empty:
+                continue
+            rows += chunk.shape[0]
+
+            # Every date before the chunk's last row's date is complete:
+            pending = chunk if pending is None else pd.concat([pending, chunk], ignore_index=True)
+            complete = pending['time'] < chunk['time'].iloc[-1].normalize()
+            for date, prices in sorted(self.pivot(pending[complete]).items()):
+                yield date, prices
+            pending = pending[~complete]
+
+        if pending is not None:
+            for date, prices in sorted(self.pivot(pending).items()):
+                yield date, prices
+
+        print('Downloaded %s Prices For %s Dates In %.2fs' % (rows, len(dates), time.time() - start))
+
+    def getbulk(self, dates, symbols=None, chunksize=100000):
+        ''' Get Closing Prices of All (or the Given) Symbols on Multiple Dates,
+        as a {date: (minute x symbol) prices} Dictionary
         '''
+        return dict(self.iterbulk(dates, symbols, chunksize))
+
+    @classmethod
+    def pivot(cls, prices):
+        ''' Pivot Long (symbol, time, close) Rows Into a {date: (minute x
+        symbol) closes} Dictionary, Without Any Per-Row Python
         '''
-        prices = {}
-        for symbol in symbols:
+        pivoted = {}
+        if prices.empty:
+            return pivoted
+
+        times = prices['time'].values.astype('datetime64[ns]')
+        days = times.astype('datetime64[D]')
+        for day in np.unique(days):
+            rows = days == day
+            minutes, timecodes = np.unique(times[rows], return_inverse=True)
+            symbolcodes, symbols = pd.factorize(prices['symbol'].values[rows], sort=True)
+
+            matrix = np.full((len(minutes), len(symbols)), np.nan)
+            matrix[timecodes, symbolcodes] = prices['close'].values[rows]
+            pivoted[pd.Timestamp(day).date()] = pd.DataFrame(matrix, index=pd.DatetimeIndex(minutes), columns=symbols)
+
+        return pivoted
+
+    def _fetchdate(self, task):
+        ''' Fetch Prices for a (symbols, date, retries, backoff) Task, Retrying
+        Failed Queries After Exponentially Growing Waits (Empty If the Date Has
+        No Prices, None If Every Attempt Fails)
+        '''
+        symbols, date, retries, backoff = task
+        for attempt in range(retries + 1):
             try:
-                values = self.getprices(symbol, date).close
-                if not values.empty:
-                    prices[symbol] = values
+                return date, self.getbulk([date], symbols).get(pd.Timestamp(date).date(), pd.DataFrame())
             except:
-                print 'Warning: (%s|%s) Could Not Be Fetched:'
+                print 'Warning: (%s) Could Not Be Fetched (Attempt %s of %s):' % (date, attempt + 1, retries + 1)
                 print traceback.format_exc()
+                if attempt < retries:
+                    time.sleep(backoff * 2 ** attempt)
+
+        return date, None
+
+    def downloaddates(self, symbols, dates, folder='clients/datasets/prices', retries=3, backoff=1.):
+        ''' Download Prices for Multiple Dates, Fetching the Client's `workers`
+        Dates at Once Over Pooled Connections, and Writing Each Date's CSV as
+        Soon as It Completes
+
+        Returns the dates that were written
+        '''
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
 
-        pd.DataFrame(prices).ffill().to_csv('clients/datasets/prices/%s.csv' % date)
+        written = []
+        pool = ThreadPool(self.workers)
+        try:
+            tasks = [(symbols, date, retries, backoff) for date in dates]
+            for date, prices in pool.imap_unordered(self._fetchdate, tasks):
+                if prices is not None:
+                    print 'Writing %s Prices for %s...' % (prices.shape[1], date)
+                    prices.ffill().to_csv(os.path.join(folder, '%s.csv' % date))
+                    written.append(date)
+        finally:
+            pool.close()
+            pool.join()
+
+        return written
+
+    def download(self, symbols, date):
+        '''
+        '''
+        self.downloaddates(symbols, [date], retries=0)
@@ -0,0 +1,87 @@
+import os
+import json
+import pandas as pd
+
+
+# Process-wide registry of parsed metadata, keyed by name, holding the source
+# files' modification times alongside the parsed values (so that a value is
+# re-parsed only once one of its files changes on disk):
+_registry = {}
+
+
+class ProductsClient(object):
+    def __init__(self, products='clients/datasets/products.txt', symbols='clients/datasets/iqfeed_symbols.csv'):
+        ''' Futures Contract Metadata Registry
+        '''
+        self._products = products
+        self._symbols = symbols
+
+    @classmethod
+    def _cached(cls, name, filenames, parse):
+        ''' Get a Parsed Value From the Registry, Re-Parsing If Any of Its
+        Source Files Have Been Modified Since It Was Cached
+        '''
+        mtimes = tuple(os.path.getmtime(filename) for filename in filenames)
+        cached = _registry.get(name)
+        if cached is None or cached[0] != mtimes:
+            cached = _registry[name] = (mtimes, parse())
+
+        return cached[1]
+
+    def getsymbolmap(self):
+        ''' Get IQFeed Symbol Mapping
+        '''
+        def parse():
+            symbols = pd.read_csv(self._symbols)
+            symbols.index = symbols.Symbol
+            return symbols.SymbolIQFeed.to_dict()
+
+        return self._cached(('symbols', self._symbols), [self._symbols], parse)
+
+    def _getproducts(self):
+        ''' Get the (Shared) Cached DataFrame of Products
+        '''
+        def parse():
+            codes = []
+            with open(self._products, 'r') as products:
+                for product in products:
+                    codes.append(json.loads(product))
+
+            codes = pd.DataFrame(codes)
+            mapping = self.getsymbolmap()
+            codes.index = codes.product_code.map(lambda c: mapping.get(c))
+
+            # Drop some unused columns:
+            codes.drop(['session_timedeltas', 'session_timestamps'], axis=1, inplace=True)
+
+            return codes
+
+        key = ('products', self._products, self._symbols)
+        return self._cached(key, [self._products, self._symbols], parse)
+
+    def getproducts(self):
+        ''' Get a DataFrame of Products, Indexed by IQFeed Symbol
+        '''
+        return self._getproducts().copy()
+
+    def getcontracts(self):
+        ''' Get a {IQFeed Symbol: {contract_size, tick_value}} Lookup
+        '''
+        def parse():
+            # Keep the first listing of any symbol that maps to several codes:
+            products = self._getproducts()
+            products = products[products.index.notnull() & ~products.index.duplicated()]
+            return dict(zip(products.index, products[['contract_size', 'tick_value']].to_dict('records')))
+
+        key = ('contracts', self._products, self._symbols)
+        return self._cached(key, [self._products, self._symbols], parse)
+
+    def contractsize(self, symbol):
+        ''' Get the Contract Size of the Given IQFeed Symbol
+        '''
+        return self.getcontracts()[symbol]['contract_size']
+
+    def tickvalue(self, symbol):
+        ''' Get the Tick Value of the Given IQFeed Symbol
+        '''
+        return self.getcontracts()[symbol]['tick_value']
@@ -0,0 +1,355 @@
+import os
+import glob
+import json
+import hashlib
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+
+class PriceStoreClient(object):
+    def __init__(self, path='clients/datasets/store'):
+        ''' Columnar, Memory-Mapped Store of Announcement-Day Minute Bars
+
+        The store is laid out as three files:
+          - prices.f32: float32 matrix of (total minutes x symbols) prices
+          - minutes.i64: int64 minute index (minutes since the unix epoch)
+          - meta.json: symbol dictionary, matrix shape, and per-date row ranges
+            & content hashes
+        '''
+        self.path = path
+        self._meta = None
+        self._prices = None
+        self._minutes = None
+        self._order = None
+
+    def _filename(self, name):
+        ''' Get Full Path to a File in the Store
+        '''
+        return os.path.join(self.path, name)
+
+    @classmethod
+    def readcsv(cls, filename):
+        ''' Read a Per-Date Prices CSV, Indexed by Minute Timestamps
+        '''
+        prices = pd.read_csv(filename, index_col=0).bfill()
+
+        # Timestamps are all written in the same fixed format, so parse them
+        # in one vectorized pass rather than row by row:
+        prices.index = pd.to_datetime(prices.index, format='%Y-%m-%d %H:%M:%S')
+        prices.index.name = None
+        return prices
+
+    @classmethod
+    def _digest(cls, prices, minutes):
+        ''' Hash One Date's Block of Prices & Minutes
+        '''
+        digest = hashlib.md5(np.ascontiguousarray(prices, dtype=np.float32).tobytes())
+        digest.update(np.ascontiguousarray(minutes, dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+    @property
+    def exists(self):
+        ''' Check Whether the Store Has Been Built
+        '''
+        return os.path.isfile(self._filename('meta.json'))
+
+    def build(self, folder='clients/datasets/prices'):
+        ''' Pack Every Per-Date Prices CSV in the Given Folder Into the Store
+        '''
+        frames = {}
+        for filename in sorted(glob.glob(os.path.join(folder, '*.csv'))):
+            date = os.path.basename(filename)[:-len('.csv')]
+            frames[date] = self.readcsv(filename)
+
+        self.write(frames)
+
+    def write(self, frames):
+        ''' Write a {date: prices} Dictionary to the Store (Replacing It)
+        '''
+        if not frames:
+            raise Exception('No Price Data Given to Write to Store %s' % self.path)
+
+        # Every date shares the same symbol columns, so that any date can be
+        # sliced out of the matrix as a contiguous block of rows:
+        symbols = set()
+        for prices in frames.values():
+            symbols.update(prices.columns)
+        symbols = sorted(symbols)
+        rows = sum(prices.shape[0] for prices in frames.values())
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        matrix = np.memmap(self._filename('prices.f32'), dtype=np.float32, mode='w+', shape=(rows, len(symbols)))
+        minutes = np.memmap(self._filename('minutes.i64'), dtype=np.int64, mode='w+', shape=(rows,))
+
+        # Copy each date's prices into its block of rows:
+        dates = {}
+        hashes = {}
+        offset = 0
+        for date in sorted(frames):
+            prices = frames[date].reindex(columns=symbols)
+            count = prices.shape[0]
+            matrix[offset:offset + count] = prices.values
+            minutes[offset:offset + count] = prices.index.values.astype('datetime64[m]').astype(np.int64)
+            dates[date] = [offset, offset + count]
+            hashes[date] = self._digest(matrix[offset:offset + count], minutes[offset:offset + count])
+            offset += count
+
+        matrix.flush()
+        minutes.flush()
+        del matrix, minutes
+
+        # Write the metadata last, so a half-written store is never opened:
+        with open(self._filename('meta.json'), 'w') as metafile:
+            json.dump({'symbols': symbols, 'rows': rows, 'dates': dates, 'hashes': hashes}, metafile)
+
+        # Drop any previously opened views of the store:
+        self._meta = None
+        self._prices = None
+        self._minutes = None
+        self._order = None
+
+    def append(self, date, prices):
+        ''' Add One Date's Prices to the Store
+
+        New dates with no new symbols are appended in place -- otherwise the
+        store is rewritten, with the new date's prices merged in
+        '''
+        date = str(date)
+        if not self.exists:
+            return self.write({date: prices})
+
+        self.open()
+        if date in self._meta['dates'] or not set(prices.columns).issubset(self._meta['symbols']):
+            frames = {existing: self.getdate(existing).copy() for existing in self.dates if existing != date}
+            frames[date] = prices
+            return self.write(frames)
+
+        # Write the new rows after the last row meta.json knows of, dropping any
+        # bytes an interrupted append left past it:
+        meta = self._meta
+        values = prices.reindex(columns=meta['symbols']).values.astype(np.float32)
+        minutes = prices.index.values.astype('datetime64[m]').astype(np.int64)
+        for name, array, offset in [
+            ('prices.f32', values, meta['rows'] * len(meta['symbols']) * 4),
+            ('minutes.i64', minutes, meta['rows'] * 8),
+        ]:
+            with open(self._filename(name), 'r+b') as datafile:
+                datafile.truncate(offset)
+                datafile.seek(offset)
+                datafile.write(array.tobytes())
+
+        meta['dates'][date] = [meta['rows'], meta['rows'] + prices.shape[0]]
+        meta.setdefault('hashes', {})[date] = self._digest(values, minutes)
+        meta['rows'] += prices.shape[0]
+        with open(self._filename('meta.json'), 'w') as metafile:
+            json.dump(meta, metafile)
+
+        # Re-open the (now longer) store next time it is read:
+        self._meta = None
+        self._prices = None
+        self._minutes = None
+        self._order = None
+
+    def open(self):
+        ''' Memory-Map the Store Files (Read-Only)
+        '''
+        if self._meta is None:
+            with open(self._filename('meta.json'), 'r') as metafile:
+                meta = json.load(metafile)
+
+            shape = (meta['rows'], len(meta['symbols']))
+            self._prices = np.memmap(self._filename('prices.f32'), dtype=np.float32, mode='r', shape=shape)
+            self._minutes = np.memmap(self._filename('minutes.i64'), dtype=np.int64, mode='r', shape=(shape[0],))
+            self._meta = meta
+
+        return self
+
+    @property
+    def symbols(self):
+        ''' Get All Symbols in the Store
+        '''
+        return self.open()._meta['symbols']
+
+    @property
+    def dates(self):
+        ''' Get All Dates in the Store
+        '''
+        return sorted(self.open()._meta['dates'])
+
+    def __contains__(self, date):
+        return self.exists and str(date) in self.open()._meta['dates']
+
+    def signature(self, date):
+        ''' Get a Signature of the Given Date's Prices, Which Only Changes When
+        That Date's Prices Do
+        '''
+        date = str(date)
+        digest = self.open()._meta.get('hashes', {}).get(date)
+        if digest is None:
+            # Stores built before hashes were kept are hashed as they are read:
+            start, stop = self._meta['dates'][date]
+            digest = self._digest(self._prices[start:stop], self._minutes[start:stop])
+
+        return 'store:%s' % digest
+
+    def getdate(self, date):
+        ''' Get a Zero-Copy DataFrame of the Minute Bars on the Given Date
+        '''
+        start, stop = self.open()._meta['dates'][str(date)]
+        index = pd.DatetimeIndex(self._minutes[start:stop].astype('datetime64[m]').astype('datetime64[ns]'))
+        return pd.DataFrame(self._prices[start:stop], index=index, columns=self.symbols, copy=False)
+
+    def gather(self, minutes):
+        ''' Look Up the Prices of Every Symbol at Many Minutes at Once
+
+        Takes an array of datetime64 minutes (of any shape), and returns the
+        (minutes shape x symbols) float64 prices at those minutes -- missing
+        wherever the store has no row for the minute -- along with a boolean
+        (minutes shape) mask of the minutes that were found
+        '''
+        self.open()
+        if self._order is None:
+            # Dates may have been appended in any order, so search the minute
+            # index through a sorted view of it:
+            self._order = np.argsort(self._minutes, kind='mergesort')
+
+        minutes = np.asarray(minutes).astype('datetime64[m]').astype(np.int64)
+        ordered = self._minutes[self._order]
+        positions = np.minimum(np.searchsorted(ordered, minutes.ravel()), len(ordered) - 1)
+        found = ordered[positions] == minutes.ravel()
+
+        prices = self._prices[self._order[positions]].astype(np.float64)
+        prices[~found] = np.nan
+        return prices.reshape(minutes.shape + (prices.shape[1],)), found.reshape(minutes.shape)
+
+    def benchmark(self, folder='clients/datasets/prices'):
+        ''' Time Loading Each Per-Date Prices CSV Three Ways (In Seconds)
+
+        Compares the row-by-row strptime timestamp parse, the vectorized
+        fixed-format parse, and opening the same date out of the store
+        '''
+        timings = {}
+        for filename in sorted(glob.glob(os.path.join(folder, '*.csv'))):
+            date = os.path.basename(filename)[:-len('.csv')]
+
+            start = time.time()
+            prices = pd.read_csv(filename, index_col=0)
+            read = time.time() - start
+
+            start = time.time()
+            prices.index.map(lambda ts: datetime.datetime.strptime(ts, '%Y-%m-%d %H:%M:%S'))
+            strptime = time.time() - start
+
+            start = time.time()
+            pd.to_datetime(prices.index, format='%Y-%m-%d %H:%M:%S')
+            vectorized = time.time() - start
+
+            start = time.time()
+            if date in self:
+                self.getdate(date)
+                store = time.time() - start
+            else:
+                store = np.nan
+
+            timings[date] = {
+                'read': read,
+                'strptime': strptime,
+                'vectorized': vectorized,
+                'store': store,
+            }
+
+        return pd.DataFrame(timings).T[['read', 'strptime', 'vectorized', 'store']]
+
+
+class TickStoreClient(object):
+    # Storage types of each tick & bar column (price columns are float32,
+    # while sizes & counts are int32, widened to int64 only if they overflow):
+    columns = {
+        'ticks': [
+            ('last', np.float32), ('lastsize', np.int32), ('totalvol', np.int32),
+            ('bid', np.float32), ('ask', np.float32), ('tickid', np.int32),
+        ],
+        'bars': [
+            ('high', np.float32), ('low', np.float32), ('open', np.float32), ('close', np.float32),
+            ('vol', np.int32), ('periodvol', np.int32),
+        ],
+    }
+
+    # Timestamp resolution of each kind of data:
+    units = {'ticks': 'us', 'bars': 's'}
+
+    def __init__(self, path='clients/datasets/ticks'):
+        ''' Compact Store of Tick & Second-Bar Data Around Announcements
+
+        Each (kind, symbol, date) is one compressed .npz file, holding the
+        first timestamp, int32 deltas between subsequent timestamps, and
+        each column at its storage type
+        '''
+        self.path = path
+
+    def _filename(self, kind, symbol, date):
+        ''' Get Full Path to a (kind, symbol, date) File in the Store
+        '''
+        return os.path.join(self.path, kind, symbol, '%s.npz' % date)
+
+    @classmethod
+    def _compact(cls, values, dtype):
+        ''' Cast Values Down to a Storage Type, Widening Integers That Overflow
+        '''
+        if np.issubdtype(dtype, np.integer):
+            values = np.nan_to_num(values)
+            if len(values) and (values.min() < np.iinfo(dtype).min or values.max() > np.iinfo(dtype).max):
+                dtype = np.int64
+
+        return np.asarray(values).astype(dtype)
+
+    def write(self, kind, symbol, date, frame):
+        ''' Write a Symbol's Ticks or Bars on a Date to the Store
+        '''
+        filename = self._filename(kind, symbol, date)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+
+        # Delta-encode the timestamps in the kind's resolution:
+        times = frame.index.values.astype('datetime64[%s]' % self.units[kind]).astype(np.int64)
+        deltas = self._compact(np.diff(times), np.int32)
+
+        columns = dict(
+            (column, self._compact(frame[column].values, dtype))
+            for column, dtype in self.columns[kind] if column in frame
+        )
+        np.savez_compressed(filename, start=times[:1], deltas=deltas, **columns)
+
+    def read(self, kind, symbol, date):
+        ''' Read a Symbol's Ticks or Bars on a Date From the Store
+        '''
+        with np.load(self._filename(kind, symbol, date)) as data:
+            times = np.concatenate([data['start'], data['start'] + np.cumsum(data['deltas'], dtype=np.int64)])
+            index = pd.DatetimeIndex(times.astype('datetime64[%s]' % self.units[kind]).astype('datetime64[ns]'))
+            columns = [column for column, _ in self.columns[kind] if column in data.files]
+            return pd.DataFrame(dict((column, data[column]) for column in columns), index=index)[columns]
+
+    def dates(self, kind, symbol):
+        ''' Get All Dates Stored for a Symbol
+        '''
+        folder = os.path.join(self.path, kind, symbol)
+        if not os.path.isdir(folder):
+            return []
+
+        return sorted(filename[:-len('.npz')] for filename in os.listdir(folder) if filename.endswith('.npz'))
+
+
+if __name__ == '__main__':
+    # Convert the per-date prices CSVs into the columnar store:
+    store = PriceStoreClient()
+    store.build()
+    print('Packed %s Dates x %s Symbols Into %s' % (len(store.dates), len(store.symbols), store.path))
+
+    # Show how per-file load times compare across the loading paths:
+    timings = store.benchmark()
+    print(timings.describe().loc[['mean', '50%', 'max']])
+    print('Speedup of vectorized vs strptime parse: %.1fx' % (timings.strptime.sum() / timings.vectorized.sum()))
@@ -23,7 +23,5 @@ if __name__ == '__main__':
     # # Get last 3 years of payroll announcement dates:
     # dates = invclient.payrolls().date[-36:]
     #
-    # # Download data for payroll observation dates:
-    # for date in reversed(dates):
-    #     print '--- Downloading %s' % date
-    #     database.download(symbols, date)
+    # # Download data for payroll observation dates, several at a time:
+    # database.downloaddates(symbols, reversed(dates))
@@ -0,0 +1,183 @@
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from research import AnnouncementResearch
+
+
+class PayrollPredictor(object):
+    def __init__(self, features=('emp-diff',), ridge=1., forgetting=1.):
+        ''' Ridge Regression Predictor of Payroll Surprises (pay-diff) From
+        Surprises Released Before the Payroll Announcement
+
+        After an initial closed-form fit, each new month is folded in with a
+        rank-one (Sherman-Morrison) update of the inverse normal matrix, so
+        refits never re-solve the full regression. A `forgetting` factor
+        below 1 discounts older months geometrically
+        '''
+        self.features = list(features)
+        self.ridge = ridge
+        self.forgetting = forgetting
+        self.count = 0
+
+    @classmethod
+    def dataset(cls, research, events=None, indicators=()):
+        ''' Build a (month x features + pay-diff) Training Set From an
+        AnnouncementResearch's (emp-diff, pay-diff) Pairs, Joined With the
+        Last Surprise of Each Given Indicator Released Before That Month's
+        Payroll Announcement (From an InvestingClient.events Table)
+
+        As with getsignal(unique=True), each month's pair comes from the last
+        ADP release made before its payroll announcement, and months with no
+        such release are left out
+        '''
+        released = pd.to_datetime(research.empdates.astype(str)).values
+        paydates = pd.to_datetime(research.paydates.astype(str)).values
+
+        # Keep one pair per payroll announcement, from the last ADP release
+        # made before it:
+        dataset = research.pairs.copy()
+        dataset['released'] = released
+        dataset['paydate'] = paydates
+        dataset = dataset[released < paydates].sort_values('released').drop_duplicates('paydate', keep='last')
+        dataset = dataset.sort_index()
+
+        paydates = pd.DataFrame({'month': dataset.index, 'paydate': dataset['paydate'].values})
+        dataset = dataset[list(research.pairs.columns)]
+        if events is None or not len(indicators):
+            return dataset
+
+        # Keep the releases made in the month before its payroll announcement:
+        events = events[events['indicator'].isin(indicators)].dropna(subset=['surprise'])
+        events = pd.DataFrame({
+            'month': pd.DatetimeIndex(events['released'].values).strftime('%Y-%m'),
+            'indicator': np.asarray(events['indicator'], dtype=object),
+            'released': events['released'].values,
+            'surprise': events['surprise'].values,
+        }).merge(paydates, on='month')
+        events = events[events['released'] < events['paydate']].sort_values('released')
+
+        surprises = events.groupby(['month', 'indicator'])['surprise'].last().unstack()
+        return dataset.join(surprises.reindex(columns=list(indicators)))
+
+    def _standardize(self, features):
+        ''' Standardize a (month x feature) Array, Filling Missing Values With
+        the Feature Means, and Prepend the Intercept Column
+        '''
+        features = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        features[np.isnan(features)] = 0.
+        return np.column_stack([np.ones(features.shape[0]), features])
+
+    def fit(self, dataset, target='pay-diff'):
+        ''' Fit the Regression to a Training Set in Closed Form
+        '''
+        dataset = dataset.dropna(subset=[target])
+        features = dataset[self.features].values.astype(np.float64)
+        target = dataset[target].values.astype(np.float64)
+
+        # Features are standardized with the training set's moments, which
+        # are then held fixed as later months are folded in:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.mean = np.nanmean(features, axis=0)
+            self.scale = np.nanstd(features, axis=0)
+        self.scale[~(self.scale > 0)] = 1.
+        self.mean[np.isnan(self.mean)] = 0.
+
+        # Weight older months (and the ridge penalty) down by the forgetting
+        # factor, as the rank-one updates do:
+        x = self._standardize(features)
+        weights = self.forgetting ** np.arange(len(target))[::-1]
+        penalty = self.ridge * self.forgetting ** len(target) * np.eye(x.shape[1])
+        self.inverse = np.linalg.inv((x * weights[:, None]).T.dot(x) + penalty)
+        self.weights = self.inverse.dot((x * weights[:, None]).T.dot(target))
+        self.count = len(target)
+
+        self._compile()
+        return self
+
+    def update(self, values, actual):
+        ''' Fold One New Month's Features & Actual pay-diff Into the Fit
+        '''
+        x = self._standardize(self._vector(values)[None, :])[0]
+
+        # Sherman-Morrison update of the (discounted) inverse normal matrix:
+        projected = self.inverse.dot(x)
+        gain = projected / (self.forgetting + x.dot(projected))
+        self.weights = self.weights + gain * (actual - x.dot(self.weights))
+        self.inverse = (self.inverse - np.outer(gain, projected)) / self.forgetting
+        self.count += 1
+
+        self._compile()
+        return self
+
+    def _compile(self):
+        ''' Fold the Standardization Into Raw-Unit Coefficients, So Predictions
+        Are a Single Dot Product
+        '''
+        self._coefficients = self.weights[1:] / self.scale
+        self._intercept = self.weights[0] - self._coefficients.dot(self.mean)
+
+    def _vector(self, values):
+        ''' Get a Feature Vector From a {feature: value} Mapping (or a Sequence
+        of Values in Feature Order), Filling Missing Features With Their Means
+        '''
+        if isinstance(values, dict) or isinstance(values, pd.Series):
+            values = [values.get(feature, np.nan) for feature in self.features]
+
+        values = np.asarray(values, dtype=np.float64)
+        return np.where(np.isnan(values), self.mean, values)
+
+    def predict(self, values):
+        ''' Predict the Payroll Surprise From the Given Features
+        '''
+        return self._intercept + self._coefficients.dot(self._vector(values))
+
+    def signal(self, values):
+        ''' Get the Trading Signal (Predicted Payroll Surprise Direction)
+        '''
+        return np.sign(self.predict(values))
+
+    def walkforward(self, dataset, warmup=24, target='pay-diff'):
+        ''' Predict Each Month From Only the Months Before It (Fitting on the
+        First `warmup` Months, Then Updating Month by Month)
+        '''
+        dataset = dataset.dropna(subset=[target]).sort_index()
+        self.fit(dataset.iloc[:warmup], target)
+
+        predictions = []
+        for month, row in dataset.iloc[warmup:].iterrows():
+            predictions.append(self.predict(row))
+            self.update(row, row[target])
+
+        results = pd.DataFrame({
+            'predicted': predictions,
+            'actual': dataset[target].values[warmup:],
+        }, index=dataset.index[warmup:])
+        results['hit'] = np.sign(results['predicted']) == np.sign(results['actual'])
+        return results
+
+
+if __name__ == '__main__':
+    # Load the employment & payroll surprise pairs, along with the surprises
+    # of other indicators released ahead of each payroll announcement:
+    research = AnnouncementResearch()
+    indicators = ('jobless-claims', 'ism')
+    events = research.client.events(indicators)
+    dataset = PayrollPredictor.dataset(research, events, indicators)
+
+    # Walk forward through the months, comparing against the sign(emp-diff)
+    # signal used in the backtests:
+    predictor = PayrollPredictor(('emp-diff',) + indicators)
+    results = predictor.walkforward(dataset)
+    baseline = np.sign(dataset['emp-diff'].reindex(results.index)) == np.sign(results['actual'])
+    print('Walk-Forward Hit Rate: %.1f%% (sign(emp-diff): %.1f%%)' % (
+        results['hit'].mean() * 100., baseline.mean() * 100.
+    ))
+
+    # Time a single prediction, as made on announcement morning:
+    latest = dataset.iloc[-1]
+    start = time.time()
+    for _ in range(10000):
+        predictor.predict(latest)
+    print('Predict Time: %.1fus' % ((time.time() - start) / 10000. * 1e6))
@@ -1,5 +1,6 @@
-import json
 import datetime
+import warnings
+import multiprocessing
 import traceback
 import numpy as np
 import pandas as pd
@@ -7,6 +8,9 @@ import matplotlib.pyplot as plt
 from tabulate import tabulate
 from clients.investing import InvestingClient
 from clients.colors import ColorClient
+from clients.store import PriceStoreClient
+from clients.products import ProductsClient
+from clients.cache import ReturnsCacheClient
 
 class AnnouncementResearch(object):
     def __init__(self, cutoff=500000):
@@ -30,7 +34,14 @@ class AnnouncementResearch(object):
         # the dataset quite a bit, which makes it difficult to assess the core
         # strategy/hypothesis):
         pairs = self.data[['emp-diff', 'pay-diff']]
-        self.pairs = pairs[pairs['emp-diff'].abs() < self.cutoff].dropna()
+        keep = ((pairs['emp-diff'].abs() < self.cutoff) & pairs.notnull().all(axis=1)).values
+        self.pairs = pairs[keep]
+
+        # Keep the ADP release & payroll announcement dates of each pair (months
+        # with two ADP releases appear twice, so these are matched by position,
+        # not month):
+        self.empdates = self.data['emp-date'][keep]
+        self.paydates = self.data['pay-date'][keep]
 
         # Separate Employment and Payroll histories:
         self.employment = self.pairs['emp-diff']
@@ -69,6 +80,9 @@ class PayrollMoversResearch(object):
         ''' Research & Plot Biggest Movers Based on Payroll Announcement Misses
         '''
         self.investing = InvestingClient()
+        self.store = PriceStoreClient()
+        self.products = ProductsClient()
+        self.returnscache = ReturnsCacheClient()
         self.months = months
         self._cache = {}
 
@@ -88,33 +102,55 @@ class PayrollMoversResearch(object):
         # Get all announcements data:
         self.announcements = self.investing.getall()
 
-    def _loadprices(self, filename):
-        ''' Load Price Files
+    def _loadprices(self, date):
+        ''' Load Prices on the Given Date
         '''
-        if filename in self._cache:
-            return self._cache[filename]
+        if date in self._cache:
+            return self._cache[date]
+        elif date in self.store:
+            # Open the date's prices straight out of the memory-mapped store:
+            self._cache[date] = self.store.getdate(date)
+            return self._cache[date]
         else:
-            # Parse timestamps into datetime objects:
-            prices = pd.read_csv(filename).bfill()
-            prices.index = prices['Unnamed: 0'].map(lambda ts: datetime.datetime.strptime(ts, '%Y-%m-%d %H:%M:%S'))
-            prices.drop('Unnamed: 0', axis=1, inplace=True)
+            # Parse prices (and their timestamps) from the date's CSV:
+            self._cache[date] = PriceStoreClient.readcsv('clients/datasets/prices/%s.csv' % date)
+            return self._cache[date]
+
+    def _pricesource(self, date):
+        ''' Get a Signature of the Prices That _loadprices Reads on the Given
+        Date (None If There Are None)
+        '''
+        if date in self.store:
+            return self.store.signature(date)
 
-            # Save to cache & return prices:
-            self._cache[filename] = prices
-            return self._cache[filename]
+        digest = self.returnscache.filehash('clients/datasets/prices/%s.csv' % date)
+        return None if digest is None else 'csv:%s' % digest
 
     def loadreturns(self):
         ''' Load aggregated returns dataframe from all potential trade events
+
+        Returns are cached on disk per trade window, so only announcements
+        that are new (or whose time or prices have changed, in the store or
+        in the CSV they were read from) are recomputed
         '''
-        allreturns = {}
-        allchanges = {}
-        allcosts = {}
+        cached = self.returnscache.load(self.before, self.after)
+        entries = {}
+        stale = False
         for _, announcement in self.payrolls[-self.months:].iterrows():
             try:
+                # Reuse this announcement's cached returns if they were computed
+                # from the same prices, at the same announcement time:
+                digest = self._pricesource(announcement.date)
+                if digest is not None:
+                    digest = '%s@%s' % (digest, announcement.time)
+                entry = cached.get(announcement.date)
+                if digest is not None and entry is not None and entry['hash'] == digest:
+                    entries[announcement.date] = entry
+                    continue
+
                 # Download equity prices on the day of this payroll announcement
                 # to determine biggest movers:
-                filename = 'clients/datasets/prices/%s.csv' % announcement.date
-                prices = self._loadprices(filename)
+                prices = self._loadprices(announcement.date)
 
                 # Get the time window on this announcement date that we want to
                 # analye for equity price movement (for this research, the analysis
@@ -132,17 +168,226 @@ class PayrollMoversResearch(object):
                 cost = prices.loc[start]
 
                 # Save results for this date:
-                allreturns[announcement.date] = returns
-                allchanges[announcement.date] = change
-                allcosts[announcement.date]   = cost
+                entries[announcement.date] = {
+                    'hash': digest,
+                    'returns': returns,
+                    'change': change,
+                    'cost': cost,
+                }
+                if digest is not None:
+                    cached[announcement.date] = entries[announcement.date]
+                    stale = True
             except Exception as e:
                 pass
                 # print('WARN: An Error Occurred Fetching Prices on %s: %s (Skipping)' % (announcement.date, e))
 
+        # Persist any newly computed announcements:
+        if stale:
+            self.returnscache.save(self.before, self.after, cached)
+
         # Aggregate price changes, returns, and costs for all dates:
-        self.returns = pd.DataFrame(allreturns).T
-        self.changes = pd.DataFrame(allchanges).T
-        self.costs = pd.DataFrame(allcosts).T
+        self.returns = pd.DataFrame({date: entry['returns'] for date, entry in entries.items()}).T
+        self.changes = pd.DataFrame({date: entry['change'] for date, entry in entries.items()}).T
+        self.costs = pd.DataFrame({date: entry['cost'] for date, entry in entries.items()}).T
+
+    @classmethod
+    def windowtensor(cls, events, before, afters):
+        ''' Build Announcement-Aligned Returns, Changes & Costs For Many Windows
+
+        Takes a list of (key, announcement datetime, prices) events, and
+        returns (announcement x minutes-after x symbol) arrays of returns,
+        changes and costs for every exit window in `afters` at once.
+        Announcements without a price `before` minutes ahead of them are left
+        out, and windows with no price at their exit minute are flagged in
+        the (announcement x minutes-after) `valid` mask
+        '''
+        afters = np.asarray(afters)
+        offsets = np.concatenate([[-before], afters]).astype('timedelta64[m]')
+
+        symbols = set()
+        for _, _, prices in events:
+            symbols.update(prices.columns)
+        symbols = sorted(symbols)
+
+        keys, starts, ends, valid = [], [], [], []
+        for key, dt, prices in events:
+            # Find the rows of the entry minute, and of every exit minute:
+            times = pd.DatetimeIndex(np.datetime64(dt, 'm') + offsets)
+            positions = prices.index.get_indexer(times)
+            if positions[0] < 0:
+                continue
+
+            window = prices.reindex(columns=symbols).values.astype(np.float64)[positions]
+            window[positions < 0] = np.nan
+
+            keys.append(key)
+            starts.append(window[0])
+            ends.append(window[1:])
+            valid.append(positions[1:] >= 0)
+
+        start = np.array(starts).reshape(len(keys), len(symbols))
+        end = np.array(ends).reshape(len(keys), len(afters), len(symbols))
+        valid = np.array(valid, dtype=bool).reshape(len(keys), len(afters))
+        return cls.packwindows(keys, symbols, before, afters, start, end, valid)
+
+    @classmethod
+    def packwindows(cls, keys, symbols, before, afters, start, end, valid):
+        ''' Pack (announcement x symbol) Entry Prices & (announcement x
+        minutes-after x symbol) Exit Prices Into the Windows of windowtensor
+        '''
+        # Compute the total return of the vehicle over each investment window,
+        # the change in product price, and the product cost (which is the
+        # same for every window, so is just broadcast along that axis):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = 100 * (end / start[:, None, :] - 1.)
+
+        return {
+            'dates': keys,
+            'symbols': symbols,
+            'before': before,
+            'afters': afters,
+            'valid': valid,
+            'returns': returns,
+            'changes': end - start[:, None, :],
+            'costs': np.broadcast_to(start[:, None, :], end.shape),
+        }
+
+    def loadwindows(self, lower=1, upper=120):
+        ''' Load returns for every exit window between lower & upper minutes
+        after each announcement in one pass over the price data
+        '''
+        events = []
+        for _, announcement in self.payrolls[-self.months:].iterrows():
+            try:
+                prices = self._loadprices(announcement.date)
+            except Exception:
+                continue
+
+            dt = datetime.datetime.combine(announcement.date, announcement.time)
+            events.append((announcement.date, dt, prices))
+
+        events = sorted(events, key=lambda event: event[0])
+        self.windows = self.windowtensor(events, self.before, np.arange(lower, upper + 1))
+
+    @classmethod
+    def holdingdays(cls, before, after):
+        ''' Compute Time a Trade Entered `before` Minutes Ahead of an
+        Announcement & Exited `after` Minutes After It Is Held, in Days
+        '''
+        return (after + before) / (60. * 23.)
+
+    @classmethod
+    def basketsharpes(cls, changes, signal, sizes, timeheld):
+        ''' Compute Annualized Sharpe Ratios of Every Suffix Basket & Window
+
+        Takes a (date x window x symbol) array of price changes, the (date)
+        trading signal, the (symbol) contract sizes and the (window) time each
+        trade is held in days, and returns a (window x basket) array where
+        basket i trades the last i + 1 symbols -- the same basket sharpe that
+        backtest reports, for every basket and window at once
+        '''
+        # Signal-weight and size the trades, treating missing prices as flat:
+        trades = changes * np.asarray(signal)[:, None, None] * np.asarray(sizes)[None, None, :]
+        trades[np.isnan(trades)] = 0.
+
+        # Basket P&Ls are cumulative sums running back from the last symbol:
+        baskets = np.cumsum(trades[:, :, ::-1], axis=2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpes = baskets.mean(axis=0) / baskets.std(axis=0, ddof=1)
+
+        return sharpes * ((252. / np.asarray(timeheld) / 12.) ** 0.5)[:, None]
+
+    @classmethod
+    def windowsharpes(cls, windows, symbols, signal, sizes):
+        ''' Compute the (window x basket) Sharpe Surface of the Given Symbols
+        Over Windows Built by windowtensor
+        '''
+        # Line up the signal with the windows (dates without prices are kept,
+        # but trade flat, as in backtest):
+        rows = pd.Index(windows['dates']).get_indexer(signal.index)
+        columns = [windows['symbols'].index(symbol) for symbol in symbols]
+        changes = windows['changes'][np.maximum(rows, 0)][:, :, columns]
+        changes[rows < 0] = np.nan
+
+        # Compute the time each trade is held in days, for each window:
+        timeheld = cls.holdingdays(windows['before'], windows['afters'])
+
+        return cls.basketsharpes(changes, signal.values, sizes, timeheld)
+
+    def sharpes(self, symbols, dates, lower=1, upper=120):
+        ''' Get Basket Sharpe Ratios for Every Suffix Basket (of 3+ Symbols) of
+        the Given Symbols, Across Trade Windows of lower-upper Minutes
+        '''
+        self.loadwindows(lower, upper)
+
+        # Get futures contract sizes for the symbols being traded:
+        sizes = self.getproducts().loc[symbols].contract_size.values.astype(np.float64)
+
+        sharpes = self.windowsharpes(self.windows, symbols, self.getsignal(dates), sizes)
+        return {
+            tuple(symbols[-i:]): pd.Series(sharpes[:, i - 1], index=self.windows['afters'])
+            for i in range(3, len(symbols) + 1)
+        }
+
+    def grid(self, symbols, dates, befores=range(1, 61), lower=1, upper=240, workers=None):
+        ''' Get Basket Sharpe Ratios for Every Suffix Basket (of 3+ Symbols)
+        Across Both Entry (Minutes Before) & Exit (Minutes After) Windows
+
+        Entry windows are fanned out across a pool of `workers` processes,
+        which each memory-map the price store read-only
+        '''
+        if not self.store.exists:
+            raise Exception('Price Store Not Built, Run `python -m clients.store` First')
+
+        symbols = list(symbols)
+        afters = np.arange(lower, upper + 1)
+        signal = self.getsignal(dates)
+        sizes = self.getproducts().loc[symbols].contract_size.values.astype(np.float64)
+
+        # Only the traded announcements need to be loaded by the workers:
+        events = [
+            (announcement.date, datetime.datetime.combine(announcement.date, announcement.time))
+            for _, announcement in self.payrolls[-self.months:].iterrows()
+            if announcement.date in signal.index and announcement.date in self.store
+        ]
+        tasks = [{
+            'store': self.store.path,
+            'events': events,
+            'symbols': symbols,
+            'signal': signal,
+            'sizes': sizes,
+            'before': before,
+            'afters': afters,
+        } for before in befores]
+
+        if workers == 1:
+            surfaces = [_gridworker(task) for task in tasks]
+        else:
+            pool = multiprocessing.Pool(workers)
+            try:
+                surfaces = pool.map(_gridworker, tasks)
+            finally:
+                pool.close()
+                pool.join()
+
+        sharpes = np.concatenate(surfaces)
+        index = pd.MultiIndex.from_product([list(befores), afters], names=['before', 'after'])
+        return pd.DataFrame({
+            tuple(symbols[-i:]): sharpes[:, i - 1]
+            for i in range(3, len(symbols) + 1)
+        }, index=index)
+
+    @classmethod
+    def optimize(cls, sharpes):
+        ''' Get the (basket, before, after, sharpe) With the Highest Sharpe
+        Ratio Out of a grid of Sharpe Ratios
+        '''
+        values = sharpes.values.astype(np.float64)
+        row, column = np.unravel_index(np.nanargmax(values), values.shape)
+        basket = tuple(s for s in sharpes.columns[column] if isinstance(s, str))
+        before, after = sharpes.index[row]
+        return basket, int(before), int(after), float(values[row, column])
 
     def combinedata(self):
         ''' Combine price movement dataset with payroll announcement forecasts
@@ -164,31 +409,164 @@ class PayrollMoversResearch(object):
         # values:
         return prices
 
+    @classmethod
+    def correlate(cls, values, target):
+        ''' Correlate Each Column of a (date x symbol) Array With a (date)
+        Target Array, Using Pairwise-Complete Observations (like pandas corr)
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        mask = ~np.isnan(values) & ~np.isnan(target)[:, None]
+        count = mask.sum(axis=0).astype(np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # De-mean each (column, target) pair over the dates they share:
+            x = np.where(mask, values, 0.)
+            y = np.where(mask, target[:, None], 0.)
+            x = np.where(mask, x - x.sum(axis=0) / count, 0.)
+            y = np.where(mask, y - y.sum(axis=0) / count, 0.)
+            corrs = (x * y).sum(axis=0) / np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+
+        corrs[count < 2] = np.nan
+        return corrs
+
+    @classmethod
+    def momentcorrelations(cls, count, sx, sy, sxx, syy, sxy, minperiods):
+        ''' Compute Pearson Correlations From Sums of the Pairwise Moments
+        (Missing Where Fewer Than `minperiods` Observations Were Summed)
+
+        Correlations don't change under a shift, so the sums should be taken
+        over mean-shifted series, keeping the sums of squares well conditioned
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = sxy - sx * sy / count
+            variances = (sxx - sx * sx / count) * (syy - sy * sy / count)
+            corrs = covariance / np.sqrt(variances)
+
+        corrs[count < max(minperiods, 2)] = np.nan
+        return corrs
+
+    @classmethod
+    def rollcorrelate(cls, values, target, window=None, minperiods=3):
+        ''' Correlate Each Column of a (date x symbol) Array With a (date)
+        Target Array As Of Each Date, Using Only the Dates Before It
+
+        Correlations are expanding, or over the last `window` dates, and are
+        built from running sums of the pairwise moments, so every date costs
+        the same regardless of how much history came before it
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        mask = ~np.isnan(values) & ~np.isnan(target)[:, None]
+
+        # Shift each series by its mean (see momentcorrelations):
+        with np.errstate(invalid='ignore'):
+            x = np.where(mask, values - np.nanmean(values, axis=0), 0.)
+            y = np.where(mask, (target - np.nanmean(target))[:, None], 0.)
+
+        # Running sums of the moments, where row t covers the dates before t:
+        moments = np.array([mask, x, y, x * x, y * y, x * y], dtype=np.float64)
+        sums = np.zeros((moments.shape[0], moments.shape[1] + 1, moments.shape[2]))
+        np.cumsum(moments, axis=1, out=sums[:, 1:])
+        sums = sums[:, :-1]
+        if window is not None:
+            lagged = np.zeros_like(sums)
+            lagged[:, window:] = sums[:, :-window]
+            sums = sums - lagged
+
+        count, sx, sy, sxx, syy, sxy = sums
+        return cls.momentcorrelations(count, sx, sy, sxx, syy, sxy, minperiods)
+
     def correlations(self, dates=None):
         ''' Compute Price Movement Correlations with Payroll Announcments
         '''
         if dates:
             # Use the subset of dates given to compute the signal/future
             # product correlations:
-            return self.data.loc[dates].corr()['payroll']
+            data = self.data.loc[dates]
         else:
-            return self.data.corr()['payroll']
+            data = self.data
+
+        corrs = self.correlate(data.values, data['payroll'].values)
+        return pd.Series(corrs, index=data.columns, name='payroll')
+
+    def rollingcorrs(self, window=None, minperiods=3):
+        ''' Compute Price Movement Correlations with Payroll Announcments As Of
+        Each Announcement, From Only the Announcements Before It (Expanding,
+        or Over the Last `window` Announcements)
+        '''
+        data = self.data.sort_index()
+        prices = data.drop('payroll', axis=1)
+        corrs = self.rollcorrelate(prices.values, data['payroll'].values, window, minperiods)
+        return pd.DataFrame(corrs, index=data.index, columns=prices.columns)
 
     @classmethod
-    def smooth(cls, series, span=1):
-        ''' Smooth the given time series
+    def kernel(cls, span, kernel='boxcar'):
+        ''' Get the Weights of a Centered Smoothing Kernel, Spanning `span`
+        Points Either Side of Its Center
         '''
-        smoothed = series.copy()
-        for i in series.index:
-            smoothed[i] = series.loc[(i - span - 1):(i + span)].mean()
+        offsets = np.arange(-span, span + 1, dtype=np.float64)
+        if kernel == 'boxcar':
+            return np.ones_like(offsets)
+        elif kernel == 'triangular':
+            return span + 1. - np.abs(offsets)
+        elif kernel == 'epanechnikov':
+            return 1. - (offsets / (span + 1.)) ** 2
+        elif kernel == 'gaussian':
+            return np.exp(-0.5 * (offsets / max(span / 2., 0.5)) ** 2)
+        else:
+            raise Exception('Unknown Smoothing Kernel: %s' % kernel)
+
+    @classmethod
+    def convolve(cls, values, weights):
+        ''' Take the Weighted Average of Each Point's Neighbourhood in an Array,
+        Skipping Missing Values (and Any Neighbours Past the Array's Edges)
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        # Pad each axis by the kernel's reach, so every kernel offset is just
+        # a shifted view of the padded arrays:
+        pads = [(size // 2, size // 2) for size in weights.shape]
+        padded = np.pad(np.where(valid, values, 0.), pads, mode='constant')
+        counted = np.pad(valid.astype(np.float64), pads, mode='constant')
+
+        total = np.zeros(values.shape)
+        weight = np.zeros(values.shape)
+        for offset in np.ndindex(*weights.shape):
+            window = tuple(slice(start, start + size) for start, size in zip(offset, values.shape))
+            total += weights[offset] * padded[window]
+            weight += weights[offset] * counted[window]
 
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return total / weight
+
+    @classmethod
+    def smooth(cls, series, span=1, kernel='boxcar'):
+        ''' Smooth the given time series (or each column of a DataFrame) with a
+        centered moving kernel
+        '''
+        weights = cls.kernel(span, kernel)
+        if isinstance(series, pd.DataFrame):
+            weights = weights[:, None]
+
+        smoothed = series.copy()
+        smoothed[:] = cls.convolve(series.values, weights)
         return smoothed
 
+    @classmethod
+    def smoothsurface(cls, surface, spans=(1, 1), kernel='boxcar'):
+        ''' Smooth a (window x basket) Sharpe Surface Across Both Windows &
+        Baskets at Once
+        '''
+        weights = np.outer(cls.kernel(spans[0], kernel), cls.kernel(spans[1], kernel))
+        return pd.DataFrame(cls.convolve(surface.values, weights), index=surface.index, columns=surface.columns)
+
     @property
     def timeheld(self):
         ''' Compute Time Each Trade is Held in Days
         '''
-        return (self.after + self.before) / (60. * 23.)
+        return self.holdingdays(self.before, self.after)
 
     @property
     def dates(self):
@@ -212,26 +590,12 @@ class PayrollMoversResearch(object):
     def getproducts(self):
         ''' Get a DataFrame of Products
         '''
-        codes = []
-        with open('clients/datasets/products.txt', 'r') as products:
-            for product in products:
-                codes.append(json.loads(product))
-
-        codes = pd.DataFrame(codes)
-        mapping = self.getsymbolmap()
-        codes.index = codes.product_code.map(lambda c: mapping.get(c))
-
-        # Drop some unused columns:
-        codes.drop(['session_timedeltas', 'session_timestamps'], axis=1, inplace=True)
-
-        return codes
+        return self.products.getproducts()
 
     def getsymbolmap(self):
         ''' Get IQFeed Symbol Mapping
         '''
-        symbols = pd.read_csv('clients/datasets/iqfeed_symbols.csv')
-        symbols.index = symbols.Symbol
-        return symbols.SymbolIQFeed.to_dict()
+        return self.products.getsymbolmap()
 
     def barchart(self, top=20, dates=None):
         ''' Plot A Barchart Showing Correlations Between
@@ -259,20 +623,78 @@ class PayrollMoversResearch(object):
         '''
         return self.correlations(dates).sort_values().dropna().drop('payroll')[-top:]
 
-    def backtest(self, symbols, dates):
-        '''
+    def getsignal(self, dates, unique=False):
+        ''' Get the Trading Signal (Employment Miss Direction) on the Given Dates
+
+        Months with two ADP releases give two signals for the same payroll
+        date -- with `unique` set, only the last ADP release made before the
+        payroll announcement is kept (and payroll dates with no ADP release
+        before them get no signal)
         '''
-        # Get the months that we have pricing information on:
-        months = self.returns.loc[dates].index.map(lambda dt: dt.strftime('%Y-%m'))
+        # Get the months of the given dates:
+        months = pd.Index(dates).map(lambda dt: dt.strftime('%Y-%m'))
 
         # Get employment announcment values (this is our trading signal):
-        employment = self.announcements.copy().loc[months].dropna()[['emp-diff', 'pay-date']]
+        employment = self.announcements.copy().loc[months].dropna()[['emp-diff', 'emp-date', 'pay-date']]
+        if unique:
+            employment['released'] = pd.to_datetime(employment['emp-date'].astype(str)).values
+            before = employment['released'].values < pd.to_datetime(employment['pay-date'].astype(str)).values
+            employment = employment[before].sort_values('released').drop_duplicates('pay-date', keep='last')
         employment.index = employment['pay-date']
 
         # Compute the trading signal:
-        signal = employment['emp-diff'].loc[self.returns.loc[dates].index].dropna()
+        if unique:
+            signal = employment['emp-diff'].reindex(dates).dropna()
+        else:
+            signal = employment['emp-diff'].loc[dates].dropna()
         signal[signal > 0] = 1.
         signal[signal < 0] = -1.
+        return signal
+
+    @classmethod
+    def summarize(cls, trades, returns, timeheld):
+        ''' Compute Summary Statistics of Every Column of a (date x symbol)
+        Trades Array in One Pass (Sharpe Ratios Come From the Matching Returns)
+        '''
+        trades = np.asarray(trades, dtype=np.float64)
+        returns = np.asarray(returns, dtype=np.float64)
+
+        # All-missing columns just get missing statistics:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            count = (~np.isnan(trades)).sum(axis=0)
+            mean = np.nanmean(trades, axis=0)
+            std = np.nanstd(trades, axis=0, ddof=1)
+            lower, median, upper = np.nanpercentile(trades, [25., 50., 75.], axis=0)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                wins = (trades >= 0).sum(axis=0) / count.astype(np.float64) * 100.
+                sharpe = np.nanmean(returns, axis=0) / np.nanstd(returns, axis=0, ddof=1)
+
+            return {
+                'count': count,
+                'mean': mean,
+                'min': np.nanmin(trades, axis=0),
+                'max': np.nanmax(trades, axis=0),
+                '25(%)': lower,
+                '50(%)': median,
+                '75(%)': upper,
+                'total_dates': np.repeat(trades.shape[0], trades.shape[1]),
+                'total_pnl': np.nansum(trades, axis=0),
+                'total_volume': count,
+                'std_unit_pnl': std,
+                'std_daily_pnl': std,
+                'mean_unit_pnl': mean,
+                'average_daily_pnl': mean,
+                'win(%)': wins,
+                'sharpe': sharpe * ((252. / timeheld / 12.) ** 0.5),
+            }
+
+    def backtest(self, symbols, dates):
+        '''
+        '''
+        # Get the trading signal on the dates that we have pricing information on:
+        signal = self.getsignal(self.returns.loc[dates].index)
 
         # Compute trades on symbols based on signals:
         returns = self.returns.loc[signal.index][symbols].fillna(0.).multiply(signal, axis=0)
@@ -287,51 +709,21 @@ class PayrollMoversResearch(object):
         # Adjust trade data based on futures contract sizes:
         trades *= sizes
 
-        # Get summary stats for all symbols:
-        summary = {}
-        for symbol in symbols:
-            summary[codes[symbol]] = {
-                'mean': trades[symbol].mean(),
-                'count': trades[symbol].count(),
-                'min': trades[symbol].min(),
-                'max': trades[symbol].max(),
-                '50(%)': trades[symbol].median(),
-                '25(%)': np.percentile(trades[symbol].dropna(), 25.),
-                '75(%)': np.percentile(trades[symbol].dropna(), 75.),
-                'total_dates': len(trades[symbol]),
-                'total_pnl': trades[symbol].sum(),
-                'total_volume': trades[symbol].count(),
-                'std_unit_pnl': trades[symbol].std(),
-                'std_daily_pnl': trades[symbol].std(),
-                'mean_unit_pnl': trades[symbol].mean(),
-                'average_daily_pnl': trades[symbol].mean(),
-                'win(%)': (trades[trades[symbol] >= 0].count()[symbol]) / float(trades[symbol].count()) * 100.,
-                'sharpe': returns[symbol].mean() / returns[symbol].std() * ((252. / self.timeheld / 12.) ** 0.5)
-            }
+        # Get summary stats for all symbols, and the basket, in one pass (the
+        # basket sharpe is based on its trades, rather than on returns):
+        basket = trades.sum(axis=1).values
+        summary = self.summarize(
+            np.column_stack([trades.values, basket]),
+            np.column_stack([returns.values, basket]),
+            self.timeheld,
+        )
+        stats = pd.DataFrame(summary, index=list(codes[symbols]) + ['basket']).T
 
-        stats = pd.DataFrame(summary)
-
-        # Compute basket stats:
-        basket = trades.sum(axis=1)
-        basketstats = {
-            'mean': basket.mean(),
-            'count': stats.T['count'].sum(),
-            'min': basket.min(),
-            'max': basket.max(),
-            '50(%)': basket.median(),
-            '25(%)': np.percentile(basket.dropna(), 25.),
-            '75(%)': np.percentile(basket.dropna(), 75.),
-            'total_pnl': basket.sum(),
-            'std_unit_pnl': basket.std(),
-            'std_daily_pnl': basket.std(),
-            'mean_unit_pnl': basket.mean(),
-            'average_daily_pnl': basket.mean(),
-            'total_dates': len(basket),
-            'total_volume': stats.T['count'].sum(),
-            'win(%)': (basket[basket >= 0].count()) / float(basket.count()) * 100.,
-            'sharpe': basket.mean() / basket.std() * ((252. / self.timeheld / 12.) ** 0.5)
-        }
-        stats['basket'] = pd.Series(basketstats)
+        # The basket is traded as one position per symbol:
+        stats.loc[['count', 'total_volume'], 'basket'] = summary['count'][:-1].sum()
+
+        # Keep a single column for any product code traded more than once:
+        stats = stats.loc[:, ~stats.columns.duplicated(keep='last')]
 
         # Reorder index to match required convention:
         stats = stats.T[[
@@ -349,68 +741,480 @@ class PayrollMoversResearch(object):
         return trades, stats
 
 
+    @classmethod
+    def resample(cls, pnl, signal, iterations, method='permutation', block=3, seed=None):
+        ''' Get (Unannualized) Basket Sharpe Ratios of Resampled Trades
+
+        Takes the (date) unsigned basket P&L and (date) trading signal, and
+        either shuffles the signal across dates ('permutation'), or resamples
+        circular blocks of `block` consecutive signed trades ('bootstrap'),
+        for every iteration at once
+        '''
+        random = np.random.RandomState(seed)
+        count = len(pnl)
+
+        if method == 'permutation':
+            shuffles = np.argsort(random.rand(iterations, count), axis=1)
+            trades = signal[shuffles] * pnl[None, :]
+        elif method == 'bootstrap':
+            blocks = int(np.ceil(count / float(block)))
+            starts = random.randint(0, count, size=(iterations, blocks))
+            indexes = (starts[:, :, None] + np.arange(block)[None, None, :]) % count
+            trades = (signal * pnl)[indexes.reshape(iterations, -1)[:, :count]]
+        else:
+            raise Exception('Unknown Resampling Method: %s' % method)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return trades.mean(axis=1) / trades.std(axis=1, ddof=1)
+
+    def significance(self, symbols, dates, iterations=10000, method='permutation', block=3,
+                     confidence=95., workers=None, chunksize=20000, seed=None):
+        ''' Test the Significance of a Basket's Backtest Sharpe Ratio
+
+        Runs `iterations` resampled versions of the basket trades (see
+        resample), returning the resampled (annualized) sharpe ratios and a
+        summary of the observed sharpe's p-value and confidence band --
+        iterations are split into chunks across a process pool when there
+        are more than `chunksize` of them
+        '''
+        symbols = list(symbols)
+        signal = self.getsignal(self.returns.loc[dates].index)
+
+        # Get the unsigned, contract-sized basket P&L on each date:
+        sizes = self.getproducts().loc[symbols].contract_size
+        pnl = (self.changes.loc[signal.index][symbols].fillna(0.) * sizes).sum(axis=1).values
+        signal = signal.values
+        annualize = (252. / self.timeheld / 12.) ** 0.5
+        observed = (signal * pnl).mean() / (signal * pnl).std(ddof=1) * annualize
+
+        # Split the iterations into independently seeded chunks:
+        seeds = np.random.RandomState(seed).randint(0, 2 ** 31 - 1, size=int(np.ceil(iterations / float(chunksize))))
+        tasks = [{
+            'pnl': pnl,
+            'signal': signal,
+            'iterations': min(chunksize, iterations - i * chunksize),
+            'method': method,
+            'block': block,
+            'seed': chunkseed,
+        } for i, chunkseed in enumerate(seeds)]
+
+        if workers == 1 or len(tasks) == 1:
+            chunks = [_resampleworker(task) for task in tasks]
+        else:
+            pool = multiprocessing.Pool(workers)
+            try:
+                chunks = pool.map(_resampleworker, tasks)
+            finally:
+                pool.close()
+                pool.join()
+
+        sharpes = np.concatenate(chunks) * annualize
+
+        # Permuted signals test against the signal being uninformative, while
+        # bootstrapped trades test against the basket sharpe being <= 0:
+        if method == 'permutation':
+            pvalue = (1. + np.sum(sharpes >= observed)) / (1. + len(sharpes))
+        else:
+            pvalue = (1. + np.sum(sharpes <= 0.)) / (1. + len(sharpes))
+
+        tail = (100. - confidence) / 2.
+        lower, upper = np.nanpercentile(sharpes, [tail, 100. - tail])
+        stats = pd.Series({
+            'sharpe': observed,
+            'p-value': pvalue,
+            'lower': lower,
+            'upper': upper,
+            'mean': np.nanmean(sharpes),
+            'iterations': len(sharpes),
+        })[['sharpe', 'p-value', 'lower', 'upper', 'mean', 'iterations']]
+
+        return sharpes, stats
+
     def scan(self, symbols, dates, lower=1, upper=120, smoothed=True, plot=True):
         ''' Scan over trade window/basket combinations
         '''
-        original = self.after
-        try:
-            # Break out symbols into baskets, so we can anaylze each basket's
-            # sharpe ratios individually:
-            baskets = {
-                tuple(symbols[-i:]): []
-                for i in range(3, len(symbols) + 1)
-            }
-
-            # Iterate over window sizes:
-            for after in range(lower, upper + 1):
-
-                #
-                self.after = after
-                print 'Scanning (%s-%s) Window...' % (self.before, self.after)
-                self.loadreturns()
-
-                # For each product basket, get backtest stats
-                for basket in baskets:
-                    _, stats = self.backtest(list(basket), dates=dates)
-                    baskets[basket].append(stats.basket.sharpe)
-
-            # Maybe Smooth Data Series:
-            if smoothed:
-                for key in baskets:
-                    series = pd.Series(baskets[key])
-                    baskets[key] = self.smooth(series)
-
-            # Maybe plot the resulting sharpe ladders:
-            if plot:
-                # Initialize Our Line Plot:
-                plt.figure(figsize=(28, 16))
-
-                # Plot the sharpe-ratio/minute surfaces for each basket:
-                minutes = list(range(lower, upper + 1))
-                for basket in sorted(baskets.keys(), key=lambda x: len(x), reverse=True):
-                    sharpes = baskets[basket]
-                    plt.plot(minutes, sharpes, label='-'.join(reversed(basket)), lw=2.)
-
-                # Plot Target Sharpe Ratio
-                target = 2.0
-                plt.hlines(target, lower, upper, colors=ColorClient.lightgray, label='Target Sharpe (%s)' % target)
-
-                # Add some axis labeling & save plot:
-                plt.title('Sharpe Ratios Across Trade Windows & Baskets')
-                plt.ylabel('SHARPE (annualized)')
-                plt.xlabel('TRADE WINDOW (min. after payroll announcement)')
-                plt.legend()
-                plt.savefig('sharpes.png', bbox_inches='tight')
-                plt.close()
-
-        finally:
-            # Revert after and prices value back to original amount:
-            self.after = original
-            self.loadreturns()
+        # Break out symbols into baskets, and get each basket's sharpe ratios
+        # across all window sizes:
+        print 'Scanning (%s-%s...%s) Windows...' % (self.before, lower, upper)
+        minutes = list(range(lower, upper + 1))
+        baskets = self.sharpes(list(symbols), dates, lower, upper)
+
+        # Maybe Smooth Data Series:
+        if smoothed:
+            for key in baskets:
+                baskets[key] = self.smooth(baskets[key])
+
+        # Maybe plot the resulting sharpe ladders:
+        if plot:
+            # Initialize Our Line Plot:
+            plt.figure(figsize=(28, 16))
+
+            # Plot the sharpe-ratio/minute surfaces for each basket:
+            for basket in sorted(baskets.keys(), key=lambda x: len(x), reverse=True):
+                sharpes = baskets[basket]
+                plt.plot(minutes, sharpes, label='-'.join(reversed(basket)), lw=2.)
+
+            # Plot Target Sharpe Ratio
+            target = 2.0
+            plt.hlines(target, lower, upper, colors=ColorClient.lightgray, label='Target Sharpe (%s)' % target)
+
+            # Add some axis labeling & save plot:
+            plt.title('Sharpe Ratios Across Trade Windows & Baskets')
+            plt.ylabel('SHARPE (annualized)')
+            plt.xlabel('TRADE WINDOW (min. after payroll announcement)')
+            plt.legend()
+            plt.savefig('sharpes.png', bbox_inches='tight')
+            plt.close()
 
         return pd.DataFrame(baskets, index=minutes)
 
 
+class WalkForwardResearch(object):
+    def __init__(self, research, top=6, lower=1, upper=120, window=None, warmup=24, minbasket=3):
+        ''' Walk-Forward Backtest of Payroll Movers Baskets
+
+        For each announcement, the `top` symbols are reselected from their
+        payroll correlations as of that announcement, and the basket & exit
+        window from Sharpe ratios over the announcements before it, before
+        trading that announcement (after `warmup` announcements of history)
+
+        Where a month had two ADP releases, the signal comes from the last one
+        made before the payroll announcement, and announcements with no ADP
+        release before them are not traded (see getsignal)
+        '''
+        self.research = research
+        self.top = top
+        self.lower = lower
+        self.upper = upper
+        self.window = window
+        self.warmup = warmup
+        self.minbasket = minbasket
+
+    def run(self):
+        ''' Walk Forward Through the Announcements, Returning the Trades Made
+        and Their Summary Stats
+        '''
+        research = self.research
+        research.loadwindows(self.lower, self.upper)
+        windows = research.windows
+        symbols = windows['symbols']
+
+        # Symbol correlations as of each announcement, from prior data only:
+        corrs = research.rollingcorrs(self.window)
+
+        # Signal-weighted, contract-sized trades for every date, window and
+        # symbol (dates without a signal are never traded):
+        signal = research.getsignal(windows['dates'], unique=True).reindex(windows['dates'])
+        sizes = research.getproducts()['contract_size']
+        sizes = sizes[~sizes.index.duplicated()].reindex(symbols).values.astype(np.float64)
+        trades = windows['changes'] * signal.values[:, None, None] * sizes[None, None, :]
+        trades[np.isnan(trades)] = 0.
+        timeheld = PayrollMoversResearch.holdingdays(windows['before'], windows['afters'])
+        annualize = ((252. / timeheld / 12.) ** 0.5)[:, None]
+
+        # Running sums of every symbol's P&L, and of every pair of symbols'
+        # P&L products, over the dates traded so far -- any basket's P&L mean
+        # and variance can be read straight off these, so each step only
+        # needs to add in the latest date:
+        count = 0
+        sums = np.zeros(trades.shape[1:])
+        products = np.zeros((len(windows['afters']), len(symbols), len(symbols)))
+
+        dates, results = [], []
+        for row, date in enumerate(windows['dates']):
+            if np.isnan(signal.iloc[row]):
+                continue
+
+            if count >= self.warmup and date in corrs.index:
+                # Select the top correlated symbols (that can be traded):
+                ranked = corrs.loc[date].reindex(symbols)[~np.isnan(sizes)].dropna().sort_values()
+                selected = [symbols.index(symbol) for symbol in ranked.index[-self.top:]]
+
+                # Sharpe ratios of every suffix basket of the selected symbols
+                # for every window, from the running sums:
+                if len(selected) >= self.minbasket:
+                    reverse = selected[::-1]
+                    totals = np.cumsum(sums[:, reverse], axis=1)
+                    squares = np.cumsum(np.cumsum(products[:, reverse][:, :, reverse], axis=1), axis=2)
+                    squares = np.diagonal(squares, axis1=1, axis2=2)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        variance = (squares - totals * totals / count) / (count - 1)
+                        sharpes = (totals / count) / np.sqrt(variance) * annualize
+
+                    # Trade the best basket & window on this announcement:
+                    sharpes = sharpes[:, self.minbasket - 1:]
+                    if not np.isnan(sharpes).all():
+                        window, size = np.unravel_index(np.nanargmax(sharpes), sharpes.shape)
+                        basket = reverse[:size + self.minbasket]
+                        dates.append(date)
+                        results.append({
+                            'basket': tuple(symbols[i] for i in reversed(basket)),
+                            'after': windows['afters'][window],
+                            'sharpe': sharpes[window, size],
+                            'signal': signal.iloc[row],
+                            'pnl': trades[row, window, basket].sum(),
+                        })
+
+            # Add this announcement into the running sums:
+            count += 1
+            sums += trades[row]
+            products += trades[row][:, :, None] * trades[row][:, None, :]
+
+        trades = pd.DataFrame(results, index=dates, columns=['basket', 'after', 'sharpe', 'signal', 'pnl'])
+        return trades, self.summary(trades)
+
+    def summary(self, trades):
+        ''' Summarize the Walk-Forward Trades
+        '''
+        pnl = trades['pnl'].astype(np.float64)
+        timeheld = self.research.holdingdays(self.research.before, trades['after'].astype(np.float64).mean())
+        return pd.Series({
+            'count': pnl.count(),
+            'mean': pnl.mean(),
+            'std': pnl.std(),
+            'win(%)': (pnl >= 0).mean() * 100.,
+            'sharpe': pnl.mean() / pnl.std() * ((252. / timeheld / 12.) ** 0.5),
+            'total_pnl': pnl.sum(),
+        })[['count', 'mean', 'std', 'win(%)', 'sharpe', 'total_pnl']]
+
+
+class EventStudyResearch(object):
+    def __init__(self, events, column='surprise', indicator=None, before=15):
+        ''' Research Symbol Moves Around Any Economic Releases
+
+        Takes an events table (such as InvestingClient.events), with a
+        `released` datetime and a signal `column`, and lines up every release
+        with the prices in the price store -- all releases, windows and
+        symbols are looked up at once, and the resulting windows are kept, so
+        several studies over the same releases reuse them
+
+        Tables of several indicators must be limited to one `indicator`, as
+        indicators come in different units and some are released together
+        '''
+        if indicator is not None:
+            events = events[events['indicator'] == indicator]
+        elif 'indicator' in events and events['indicator'].nunique() > 1:
+            raise Exception('Events Table Has Several Indicators, Choose One: %s' % (
+                ', '.join(sorted(str(name) for name in events['indicator'].unique()))
+            ))
+
+        events = events.dropna(subset=[column]).sort_values('released')
+        if events['released'].duplicated().any():
+            raise Exception('Events Table Has Several Releases at: %s' % (
+                events['released'][events['released'].duplicated()].iloc[0]
+            ))
+
+        self.events = events
+        self.column = column
+        self.indicator = indicator
+        self.before = before
+        self.store = PriceStoreClient()
+        self.products = ProductsClient()
+        self._windows = {}
+
+        if not self.store.exists:
+            raise Exception('Price Store Not Built, Run `python -m clients.store` First')
+
+    def loadwindows(self, lower=1, upper=120):
+        ''' Load returns for every exit window between lower & upper minutes
+        after each release (in the same layout as PayrollMoversResearch)
+        '''
+        key = (self.before, lower, upper)
+        if key not in self._windows:
+            released = self.events['released'].values.astype('datetime64[m]')
+            afters = np.arange(lower, upper + 1)
+            offsets = np.concatenate([[-self.before], afters]).astype('timedelta64[m]')
+
+            # Gather the prices at every (release, entry/exit minute) at once,
+            # and drop releases with no entry price:
+            prices, found = self.store.gather(released[:, None] + offsets[None, :])
+            keep = found[:, 0]
+
+            self._windows[key] = PayrollMoversResearch.packwindows(
+                list(pd.DatetimeIndex(released[keep])), list(self.store.symbols), self.before, afters,
+                prices[keep, 0], prices[keep, 1:], found[keep, 1:],
+            )
+
+        self.windows = self._windows[key]
+        return self.windows
+
+    @property
+    def signal(self):
+        ''' Get the Signal Values, Indexed by Release Time
+        '''
+        return pd.Series(self.events[self.column].values, index=pd.DatetimeIndex(self.events['released'].values))
+
+    def getsignal(self, dates=None):
+        ''' Get the Trading Signal (Signal Direction) at the Given Release Times
+        '''
+        signal = np.sign(self.signal)
+        return signal if dates is None else signal.reindex(dates).dropna()
+
+    def returns(self, after):
+        ''' Get (release x symbol) Returns for One Exit Window of the Loaded
+        Windows (Missing Where There Was No Exit Price)
+        '''
+        windows = self.windows
+        index = list(windows['afters']).index(after)
+        returns = np.where(windows['valid'][:, index, None], windows['returns'][:, index], np.nan)
+        return pd.DataFrame(returns, index=windows['dates'], columns=windows['symbols'])
+
+    def correlations(self, after):
+        ''' Correlate Each Symbol's Returns Over One Exit Window With the
+        Signal Values
+        '''
+        returns = self.returns(after)
+        corrs = PayrollMoversResearch.correlate(returns.values, self.signal.reindex(returns.index).values)
+        return pd.Series(corrs, index=returns.columns, name=self.column)
+
+    def sharpes(self, symbols, dates=None, lower=1, upper=120):
+        ''' Get Basket Sharpe Ratios for Every Suffix Basket (of 3+ Symbols) of
+        the Given Symbols, Across Trade Windows of lower-upper Minutes
+        '''
+        windows = self.loadwindows(lower, upper)
+        symbols = list(symbols)
+        sizes = np.array([self.products.contractsize(symbol) for symbol in symbols], dtype=np.float64)
+
+        signal = self.getsignal(windows['dates'] if dates is None else dates)
+        sharpes = PayrollMoversResearch.windowsharpes(windows, symbols, signal, sizes)
+        return {
+            tuple(symbols[-i:]): pd.Series(sharpes[:, i - 1], index=windows['afters'])
+            for i in range(3, len(symbols) + 1)
+        }
+
+
+class SurpriseCorrelationResearch(object):
+    def __init__(self, events, column='surprise', frequency='M'):
+        ''' Research Lead/Lag Correlations Between Indicator Surprises
+
+        Takes an events table (such as InvestingClient.events) and lines up
+        every indicator's `column` values by release period (monthly by
+        default -- indicators released more often are averaged over the
+        period), so that each pair of indicators can be correlated across
+        any number of periods of lead or lag
+        '''
+        events = events.dropna(subset=[column])
+        periods = pd.DatetimeIndex(events['released'].values).to_period(frequency)
+        surprises = events.groupby([periods, np.asarray(events['indicator'], dtype=object)])[column].mean()
+
+        # Keep a row for every period, released in or not, so that lags are
+        # counted in periods:
+        surprises = surprises.unstack().sort_index()
+        if len(surprises):
+            surprises = surprises.reindex(pd.period_range(surprises.index[0], surprises.index[-1], freq=frequency))
+
+        self.column = column
+        self.frequency = frequency
+        self.surprises = surprises
+
+    @classmethod
+    def transform(cls, values, method='pearson', limits=(5., 95.)):
+        ''' Transform Each Column of a (period x indicator) Array for a Robust
+        Correlation Estimator: 'rank' (Spearman) Replaces Values With Their
+        Ranks, and 'winsorized' Clips Values to the `limits` Percentiles
+
+        Ranks are taken over each indicator's own observations, rather than
+        re-ranked for every pair of indicators
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        if method == 'pearson':
+            return values
+        elif method == 'rank':
+            return pd.DataFrame(values).rank(axis=0).values
+        elif method == 'winsorized':
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                lower, upper = np.nanpercentile(values, limits, axis=0)
+            return np.clip(values, lower, upper)
+        else:
+            raise Exception('Unknown Correlation Method: %s' % method)
+
+    @classmethod
+    def lagcorrelate(cls, values, lags, minperiods=12):
+        ''' Correlate Every Pair of Columns of a (period x indicator) Array at
+        Every Lag, Using Pairwise-Complete Observations
+
+        Returns a (lag x indicator x indicator) array, where [k, i, j] is the
+        correlation of indicator i with indicator j `lags[k]` periods later
+        (so positive lags have i leading j). Each lag takes a handful of
+        masked matrix products, rather than a pandas call per pair
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        mask = (~np.isnan(values)).astype(np.float64)
+        filled = np.where(mask > 0, values, 0.)
+
+        # Shift each series by its mean (see momentcorrelations):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            filled = np.where(mask > 0, filled - np.nanmean(values, axis=0), 0.)
+
+        periods, width = values.shape
+        corrs = np.full((len(lags), width, width), np.nan)
+        for k, lag in enumerate(lags):
+            if abs(lag) >= periods:
+                continue
+
+            # Pair each period of the leading series with the period `lag`
+            # periods after it in the following series:
+            if lag >= 0:
+                x, mx, y, my = filled[:periods - lag], mask[:periods - lag], filled[lag:], mask[lag:]
+            else:
+                x, mx, y, my = filled[-lag:], mask[-lag:], filled[:periods + lag], mask[:periods + lag]
+
+            # Sums of the pairwise moments over the periods both series share:
+            corrs[k] = PayrollMoversResearch.momentcorrelations(
+                mx.T.dot(my), x.T.dot(my), mx.T.dot(y), (x * x).T.dot(my), mx.T.dot(y * y), x.T.dot(y), minperiods
+            )
+
+        return corrs
+
+    def correlations(self, lags=range(-3, 4), method='pearson', minperiods=12, limits=(5., 95.)):
+        ''' Get Lead/Lag Surprise Correlations Between Every Pair of Indicators
+
+        Returns a DataFrame indexed by (lag, leader) with a column per
+        follower, holding the correlation of the leader's surprises with the
+        follower's surprises `lag` periods later
+        '''
+        lags = list(lags)
+        values = self.transform(self.surprises.values, method, limits)
+        corrs = self.lagcorrelate(values, lags, minperiods)
+
+        indicators = list(self.surprises.columns)
+        index = pd.MultiIndex.from_product([lags, indicators], names=['lag', 'leader'])
+        return pd.DataFrame(corrs.reshape(-1, len(indicators)), index=index, columns=indicators)
+
+    def leaders(self, top=20, lags=range(1, 4), method='rank', minperiods=12):
+        ''' Get the `top` Strongest (leader, follower, lag) Surprise
+        Correlations Where the Leader Comes Before the Follower (Leaving Out
+        Each Indicator's Correlation With Itself)
+        '''
+        corrs = self.correlations(lags, method, minperiods).stack()
+        corrs.index.names = ['lag', 'leader', 'follower']
+        corrs = corrs.dropna().reset_index(name='correlation')
+        corrs = corrs[corrs['leader'] != corrs['follower']]
+        strongest = corrs['correlation'].abs().sort_values(ascending=False).index[:top]
+        return corrs.loc[strongest, ['leader', 'follower', 'lag', 'correlation']].reset_index(drop=True)
+
+
+def _gridworker(task):
+    ''' Compute the (window x basket) Sharpe Surface for One Entry Window of
+    PayrollMoversResearch.grid (module-level, so it can be sent to a pool)
+    '''
+    store = PriceStoreClient(task['store'])
+    events = [(date, dt, store.getdate(date)) for date, dt in task['events']]
+    windows = PayrollMoversResearch.windowtensor(events, task['before'], task['afters'])
+    return PayrollMoversResearch.windowsharpes(windows, task['symbols'], task['signal'], task['sizes'])
+
+
+def _resampleworker(task):
+    ''' Resample One Chunk of PayrollMoversResearch.significance Iterations
+    (module-level, so it can be sent to a pool)
+    '''
+    return PayrollMoversResearch.resample(
+        task['pnl'], task['signal'], task['iterations'], task['method'], task['block'], task['seed']
+    )
+
+
 if __name__ == '__main__':
     # # Initialize Research Client:
     # announcements = AnnouncementResearch()